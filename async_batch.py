@@ -0,0 +1,76 @@
+"""asyncio batch engine that bounds in-flight LLM calls with an adaptive concurrency limit."""
+
+import asyncio
+import os
+
+from concurrency import AIMDLimiter
+
+
+# Requests the Ollama server runs at once; matches the server's own setting
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+
+
+async def aiter_batches(batches):
+    """Iterate a plain or async iterable of batches uniformly."""
+    if hasattr(batches, "__aiter__"):
+        async for batch in batches:
+            yield batch
+    else:
+        for batch in batches:
+            yield batch
+
+
+class AsyncBatchEngine:
+    """Run an async worker over a stream of batches, as many at once as limiter allows.
+
+    Without a limiter the engine holds max_in_flight calls at most; pass a
+    shared AIMDLimiter to let the limit follow observed latency.
+    """
+
+    def __init__(self, worker, max_in_flight=OLLAMA_NUM_PARALLEL, limiter=None):
+        self.worker = worker
+        self.limiter = limiter or AIMDLimiter(max_in_flight)
+        self.in_flight = 0
+        self.completed = 0
+
+    @property
+    def max_in_flight(self):
+        return self.limiter.current()
+
+    async def _call(self, batch):
+        self.in_flight += 1
+        try:
+            return await self.worker(batch)
+        finally:
+            self.in_flight -= 1
+            self.limiter.release()
+
+    async def run(self, batches):
+        """Yield (index, batch, result) as calls finish; result is the exception if one failed.
+
+        Batches are pulled from the iterator only when a slot is free, so the
+        input can be an unbounded async stream.
+        """
+        pending = {}
+
+        def finished(tasks):
+            for task in tasks:
+                index, batch = pending.pop(task)
+                self.completed += 1
+                error = task.exception()
+                yield index, batch, error if error is not None else task.result()
+
+        index = 0
+        async for batch in aiter_batches(batches):
+            await self.limiter.acquire()
+            task = asyncio.create_task(self._call(batch))
+            pending[task] = (index, batch)
+            index += 1
+
+            for item in finished([t for t in pending if t.done()]):
+                yield item
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for item in finished(done):
+                yield item
@@ -1,19 +1,15 @@
-import requests
 import json
 import time
+from ollama_client import GENERATE, get_client
+from response_cache import cache_key, get_cache
 
 """Extract attributes from logs by streaming Mistral's response with processing time measurement."""
 
 
-def extract_attributes(log_text):
-    start_time = time.time()
-
-    prompt = f"Extract all key-value pairs from the following text and output them as JSON, " \
-             f"only output the json with no extra text:\n\n{log_text}"
-    payload = {"model": "mistral", "prompt": prompt}
-
+def stream_generate(payload):
+    """Stream a /api/generate call and return the combined response text."""
     # Use streaming to handle the chunked response
-    with requests.post("http://localhost:11434/api/generate", json=payload, stream=True) as response:
+    with get_client().stream(GENERATE, payload) as response:
         if response.status_code != 200:
             print("Error:", response.status_code, response.text)
             return None
@@ -31,19 +27,39 @@ def extract_attributes(log_text):
                 except json.JSONDecodeError:
                     print("Skipping invalid chunk:", line)
 
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        return full_response
+
+
+def extract_attributes(log_text):
+    start_time = time.time()
+
+    prompt = f"Extract all key-value pairs from the following text and output them as JSON, " \
+             f"only output the json with no extra text:\n\n{log_text}"
+    payload = {"model": "mistral", "prompt": prompt, "format": "json"}
+
+    # Repeated log text is answered from the on-disk cache
+    key = cache_key(payload["model"], prompt, {"format": payload["format"]})
+    full_response = get_cache().get(key)
+
+    if full_response is None:
+        full_response = stream_generate(payload)
+        if full_response is None:
+            return None
+        get_cache().set(key, full_response)
+
+    end_time = time.time()
+    elapsed_time = end_time - start_time
 
-        print("\nFull Combined Response:\n", full_response)
-        print(f"\nProcessing Time: {elapsed_time:.2f} seconds")
+    print("\nFull Combined Response:\n", full_response)
+    print(f"\nProcessing Time: {elapsed_time:.2f} seconds")
 
-        try:
-            result = json.loads(full_response)
-            print("\nExtracted JSON:", json.dumps(result, indent=4))
-            return result, elapsed_time
-        except json.JSONDecodeError:
-            print("\nFailed to parse JSON. Returning raw output.")
-            return full_response, elapsed_time
+    try:
+        result = json.loads(full_response)
+        print("\nExtracted JSON:", json.dumps(result, indent=4))
+        return result, elapsed_time
+    except json.JSONDecodeError:
+        print("\nFailed to parse JSON. Returning raw output.")
+        return full_response, elapsed_time
 
 
 log_data = """
@@ -53,11 +69,13 @@ Memory: 16GB
 Status=Running
 """
 
-result, processing_time = extract_attributes(log_data)
+if __name__ == "__main__":
+    result, processing_time = extract_attributes(log_data)
 
-print("\nFinal Output:")
-print("Processing Time:", processing_time, "seconds")
-print("Result:", result)
+    print("\nFinal Output:")
+    print("Processing Time:", processing_time, "seconds")
+    print("Result:", result)
+    print("Cache:", get_cache().stats())
 
 """
 RUN OUTPUT::
@@ -1,7 +1,8 @@
-import requests
 import json
 import time
 from io import StringIO
+from ollama_client import GENERATE, get_client
+from ollama_stream import StreamStats, fragment_text, iter_stream
 
 """Optimized extraction with enhanced prompt, lower temperature, and better streaming handling."""
 
@@ -20,11 +21,14 @@ def extract_attributes_optimized(log_text):
         "model": "mistral",
         "prompt": prompt,
         "temperature": 0.1,  # More deterministic output
-        "max_tokens": 500    # Limit output length
+        "max_tokens": 500,   # Limit output length
+        "format": "json"     # Constrained decoding: the output is always a JSON object
     }
 
+    stats = StreamStats()
+
     # Use streaming for efficient processing
-    with requests.post("http://localhost:11434/api/generate", json=payload, stream=True) as response:
+    with get_client().stream(GENERATE, payload) as response:
         if response.status_code != 200:
             print("❌ Error:", response.status_code, response.text)
             return None
@@ -32,15 +36,9 @@ def extract_attributes_optimized(log_text):
         # Use StringIO for faster concatenation
         buffer = StringIO()
 
-        # Iterate over streaming content
-        for chunk in response.iter_content(chunk_size=1024):
-            if chunk:
-                try:
-                    # Parse each chunk as JSON
-                    chunk_json = json.loads(chunk)
-                    buffer.write(chunk_json.get("response", ""))
-                except json.JSONDecodeError:
-                    print("⚠️ Skipping invalid chunk:", chunk)
+        # Decode complete NDJSON fragments, even when they span network chunks
+        for fragment in iter_stream(response, stats):
+            buffer.write(fragment_text(fragment))
 
         end_time = time.time()
         elapsed_time = end_time - start_time
@@ -50,6 +48,7 @@ def extract_attributes_optimized(log_text):
 
         print("\n🔹 Full Combined Response:\n", full_response)
         print(f"\n⏱️ Processing Time: {elapsed_time:.2f} seconds")
+        print(f"⚡ Stream Stats: {stats.summary()}")
 
         # Attempt to parse the final JSON
         try:
@@ -69,13 +68,14 @@ Memory: 16GB
 Status=Running
 """
 
-# Execute extraction and capture the processing time
-result, processing_time = extract_attributes_optimized(log_data)
+if __name__ == "__main__":
+    # Execute extraction and capture the processing time
+    result, processing_time = extract_attributes_optimized(log_data)
 
-# Display the result and time
-print("\n🚀 Final Output:")
-print("Processing Time:", processing_time, "seconds")
-print("Result:", result)
+    # Display the result and time
+    print("\n🚀 Final Output:")
+    print("Processing Time:", processing_time, "seconds")
+    print("Result:", result)
 
 
 """
@@ -0,0 +1,222 @@
+"""Offline benchmark: run the pipelines against mock_ollama and report throughput and latency.
+
+Client overhead is the client-side latency minus the time the stand-in server
+spent serving, i.e. what our own HTTP, parsing and pipeline code costs.
+
+    python benchmark.py --requests 200 --concurrency 8 --save baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_ollama import MockOllamaServer
+
+
+REGRESSION_TOLERANCE = 0.2  # Allowed slowdown of p50/p95 against a saved baseline
+
+CPUS = ["Intel Xeon E5-2670", "AMD EPYC 7742", "Intel Core i9-9900K", "AMD Ryzen 9 5950X"]
+STATES = ["Running", "Idle", "Down", "Overload"]
+
+
+def make_log(i):
+    """A unique server log line, so no cache or dedup stage can skip the call."""
+    return (
+        f"2025-03-20 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d} Server CPU: {CPUS[i % 4]}, "
+        f"Memory: {16 * (i % 8 + 1)}GB DDR4, Disk: {256 * (i % 4 + 1)}GB SSD. "
+        f"Status: {STATES[i % 4]}, Temperature: {30 + i % 60}°C, Alert: None."
+    )
+
+
+def make_kv_text(i):
+    return f"\nTimestamp: 2025-03-20 10:{i // 60 % 60:02d}:{i % 60:02d}\nCPU=Intel Xeon\nMemory: {i % 64 + 1}GB\nStatus=Running\n"
+
+
+# Each setup imports its pipeline lazily, after OLLAMA_HOST points at the mock server,
+# and returns a callable performing one unit of work for request number i.
+
+def setup_basic():
+    import basic
+    return lambda i: basic.extract_attributes(make_kv_text(i))
+
+
+def setup_basic_optimized():
+    import basic_optimized
+    return lambda i: basic_optimized.extract_attributes_optimized(make_kv_text(i))
+
+
+def setup_phi():
+    import phi
+    return lambda i: phi.extract_attributes(make_kv_text(i))
+
+
+def setup_tokenize_logs():
+    import tokenize_logs
+    return lambda i: tokenize_logs.send_request(tokenize_logs.PROMPT_HEADER + make_log(i))
+
+
+def setup_tokenize_schema():
+    import tokenize_schema
+    return lambda i: tokenize_schema.parse_logs_with_schema(make_log(i))
+
+
+def setup_langchain_basic(batch_lines=5):
+    import langchain_basic
+
+    def call(i):
+        lines = [make_log(i * batch_lines + j) for j in range(batch_lines)]
+        return langchain_basic.batch_process_logs(lines, dedup=False)
+    return call
+
+
+def setup_local_rag():
+    import local_rag
+    index = local_rag.create_faiss_index(local_rag.schemas)
+    return lambda i: local_rag.process_logs_with_rag([make_log(i)], index)
+
+
+SCENARIOS = {
+    "basic": setup_basic,
+    "basic_optimized": setup_basic_optimized,
+    "phi": setup_phi,
+    "tokenize_logs": setup_tokenize_logs,
+    "tokenize_schema": setup_tokenize_schema,
+    "langchain_basic": setup_langchain_basic,
+    "local_rag": setup_local_rag,
+}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_scenario(name, call, server, requests, concurrency):
+    """Run one pipeline and summarise client latency against server service time."""
+    before = server.stats.snapshot()
+    latencies = []
+    errors = []
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception as e:
+            # One failed call (timeout, injected failure, missing encoding) must not abort the suite
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+
+    after = server.stats.snapshot()
+    served = after["service_seconds"] - before["service_seconds"]
+    calls = after["requests"] - before["requests"]
+    if not latencies:
+        raise RuntimeError(f"all {requests} calls failed, first: {errors[0]}")
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "server_calls": calls,
+        "errors": len(errors),
+        "injected_failures": after["failures"] - before["failures"],
+        "throughput": requests / wall,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "client_overhead_ms": max(0.0, sum(latencies) - served) / len(latencies) * 1000,
+    }
+
+
+def compare(results, baseline):
+    """Scenarios whose p50 or p95 got slower than the baseline by more than the tolerance."""
+    previous = {row["scenario"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get(row["scenario"])
+        if old is None:
+            continue
+        for key in ("p50", "p95"):
+            if row[key] > old[key] * (1 + REGRESSION_TOLERANCE):
+                regressions.append(f"{row['scenario']} {key}: {old[key] * 1000:.1f} ms -> {row[key] * 1000:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipelines against a local mock Ollama server.")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="Subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock prompt-eval seconds per call")
+    parser.add_argument("--token-rate", type=float, default=2000.0, help="Mock generated tokens per second")
+    parser.add_argument("--chunk-bytes", type=int, default=0, help="Split streamed bytes into writes of this size")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Fail if slower than the baseline JSON at this path")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(latency=args.latency, token_rate=args.token_rate,
+                              chunk_bytes=args.chunk_bytes, failure_rate=args.failure_rate).start()
+
+    # Must be set before any pipeline module is imported
+    os.environ["OLLAMA_HOST"] = server.url
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_cache.sqlite3")
+
+    import response_cache
+    if not args.cache:
+        # A negative TTL makes every lookup a miss
+        response_cache._cache = response_cache.ResponseCache(os.environ["LLM_CACHE_PATH"], ttl=-1)
+
+    results = []
+    print(f"{'scenario':<18}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'overhead ms':>13}"
+          f"{'errors':>8}{'injected':>10}")
+    for name in args.scenarios:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                call = SCENARIOS[name]()
+        except Exception as e:
+            print(f"{name:<18}skipped: {type(e).__name__}: {e}")
+            continue
+
+        try:
+            row = run_scenario(name, call, server, args.requests, args.concurrency)
+        except RuntimeError as e:
+            print(f"{name:<18}failed: {e}")
+            continue
+        results.append(row)
+        print(f"{name:<18}{row['throughput']:>9.1f}{row['p50'] * 1000:>10.1f}{row['p95'] * 1000:>10.1f}"
+              f"{row['p99'] * 1000:>10.1f}{row['client_overhead_ms']:>13.2f}{row['errors']:>8}"
+              f"{row['injected_failures']:>10}")
+
+    server.stop()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Adaptive limit on in-flight LLM calls: additive increase, multiplicative decrease (AIMD).
+
+Congestion is judged against the fastest recent call, not an absolute
+target: once a call takes LATENCY_TOLERANCE times the baseline (the lowest
+latency per unit of work among the last BASELINE_WINDOW calls of the same
+model), requests are queueing on the server and the limit is cut by
+BACKOFF_RATIO. A timeout or an overload answer (429/503) cuts it too, and
+so does a call slower per unit than LATENCY_TARGET, when one is set and the
+baseline itself meets it. Otherwise the limit grows by about one slot per
+round of calls, up to SLOT_HEADROOM times the server's parallel slots.
+"""
+
+import asyncio
+import collections
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+
+# Opt-in ceiling: seconds per unit of work (e.g. line) a call may take, whatever the baseline
+LATENCY_TARGET = float(os.environ["LATENCY_TARGET"]) if os.environ.get("LATENCY_TARGET") else None
+LATENCY_TOLERANCE = 2.0  # A call this many times slower than the baseline counts as queueing
+BASELINE_WINDOW = 200  # Recent calls per model the baseline latency is the minimum of
+MAX_LIMIT = int(os.environ.get("MAX_IN_FLIGHT", "32"))
+MIN_LIMIT = 1
+SLOT_HEADROOM = 2  # In flight per parallel server slot at most: one running, one queued
+BACKOFF_RATIO = 0.5
+OVERLOAD_STATUS = {429, 503}
+
+_limiter = contextvars.ContextVar("limiter", default=None)
+
+
+def is_overload(error):
+    """Timeouts and 429/503 answers mean the server is queueing more than it can run."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(error).__name__:
+        return True
+    return getattr(error, "status_code", None) in OVERLOAD_STATUS
+
+
+@contextmanager
+def use_limiter(limiter):
+    """Send observe() calls made inside the block (same task or its children) to limiter."""
+    token = _limiter.set(limiter)
+    try:
+        yield limiter
+    finally:
+        _limiter.reset(token)
+
+
+def observe(latency, overloaded=False, key=None, units=1):
+    """Report one LLM call to the limiter of the current run, if there is one."""
+    limiter = _limiter.get()
+    if limiter is not None:
+        limiter.observe(latency, overloaded, key, units)
+
+
+def limiter_for(slots, limit=None, target=LATENCY_TARGET):
+    """Limiter for a run against slots parallel server slots, starting at limit (default: slots)."""
+    limit = limit or slots
+    return AIMDLimiter(limit, max_limit=min(MAX_LIMIT, max(limit, slots * SLOT_HEADROOM)), target=target)
+
+
+class AIMDLimiter:
+    """Concurrency limit for asyncio callers, adjusted from observed call latency.
+
+    acquire()/release() bracket a unit of work; observe() reports each LLM
+    call's latency. Without observations the limit stays where it started,
+    so a limiter doubles as a plain semaphore. A limiter belongs to the event
+    loop that first acquires it: create one per run, not one per process.
+    """
+
+    def __init__(self, limit, min_limit=MIN_LIMIT, max_limit=MAX_LIMIT, target=LATENCY_TARGET,
+                 tolerance=LATENCY_TOLERANCE):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.target = target
+        self.tolerance = tolerance
+        self.limit = float(min(max(limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.waiters = collections.deque()
+        self.loop = None
+        self.recent = collections.defaultdict(lambda: collections.deque(maxlen=BASELINE_WINDOW))
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.timeouts = 0
+
+    def current(self):
+        return int(self.limit)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("AIMDLimiter shared across event loops; create one per run")
+
+        while self.in_flight >= self.current():
+            waiter = loop.create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """Wake as many waiters as there are free slots."""
+        free = self.current() - self.in_flight
+        for waiter in self.waiters:
+            if free <= 0:
+                break
+            # A waiter already woken but not yet resumed still claims its slot
+            if not waiter.done():
+                waiter.set_result(None)
+            free -= 1
+
+    def baseline(self, key=None):
+        """Lowest recent latency per unit of work for key, None before its first call."""
+        recent = self.recent.get(key)
+        return min(recent) if recent else None
+
+    def observe(self, latency, overloaded=False, key=None, units=1):
+        """Adjust the limit after one call that took latency seconds for units of work (e.g. lines).
+
+        key separates models, whose speeds differ too much to share a baseline.
+        """
+        started = time.monotonic() - latency
+        per_unit = latency / max(units, 1)
+        baseline = self.baseline(key)
+        queueing = baseline is not None and per_unit > self.tolerance * baseline
+        # A target even the fastest recent call misses is not something fewer calls in flight can fix
+        too_slow = self.target is not None and baseline is not None and per_unit > self.target >= baseline
+        if overloaded:
+            self.timeouts += 1
+        else:
+            self.recent[key].append(per_unit)
+
+        if overloaded or too_slow or queueing:
+            # Calls started before the last cut were already in flight when it
+            # happened; cutting again for them would collapse the limit
+            if started >= self.last_decrease:
+                self.limit = max(self.min_limit, self.limit * BACKOFF_RATIO)
+                self.last_decrease = time.monotonic()
+                self.decreases += 1
+        elif self.waiters or self.in_flight >= self.current():
+            # Grow only while the limit is what holds work back
+            previous = self.current()
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if self.current() > previous:
+                self.increases += 1
+                self._wake()
+
+    def stats(self):
+        return {
+            "limit": self.current(),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "baseline": {str(key): self.baseline(key) for key in self.recent},
+            "target": self.target,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,132 @@
+"""Disk-backed embedding cache: float16 vectors in a memory-mapped file, slots indexed in SQLite."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", ".embedding_cache")
+MAX_ENTRIES = 100_000  # Vectors kept per model; least recently used slots are reused beyond this
+SQLITE_MAX_PARAMS = 900
+
+
+def text_key(model_id, kind, text):
+    """sha256 of (model, document/query, text)."""
+    return hashlib.sha256(f"{model_id}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an Embeddings model so repeated text is read from disk instead of re-embedded.
+
+    Each model gets its own directory holding vectors.f16, a (slots, dim)
+    float16 memmap, and index.sqlite3, mapping text keys to slots.
+    """
+
+    def __init__(self, embeddings, model_id, path=EMBEDDING_CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.path = os.path.join(path, hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16])
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.vectors = None
+        self._lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.path, "index.sqlite3"), timeout=30, check_same_thread=False)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS slots ("
+                " key TEXT PRIMARY KEY,"
+                " slot INTEGER NOT NULL UNIQUE,"
+                " accessed REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS slots_accessed ON slots (accessed)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+        meta = dict(self.db.execute("SELECT name, value FROM meta"))
+        if "dim" in meta:
+            self._open(meta["dim"], meta["capacity"])
+
+    def _open(self, dim, capacity):
+        """Map the vector file, creating it sparse on first use."""
+        file = os.path.join(self.path, "vectors.f16")
+        mode = "r+" if os.path.exists(file) else "w+"
+        self.vectors = np.memmap(file, dtype=np.float16, mode=mode, shape=(capacity, dim))
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                                [("dim", dim), ("capacity", capacity)])
+
+    def _lookup(self, keys):
+        found = {}
+        for i in range(0, len(keys), SQLITE_MAX_PARAMS):
+            part = keys[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(part))
+            found.update(self.db.execute(f"SELECT key, slot FROM slots WHERE key IN ({placeholders})", part))
+        return found
+
+    def _allocate(self):
+        """A free slot, reusing the least recently used one when the file is full."""
+        (count,) = self.db.execute("SELECT COUNT(*) FROM slots").fetchone()
+        if count < len(self.vectors):
+            return count
+        old_key, slot = self.db.execute("SELECT key, slot FROM slots ORDER BY accessed LIMIT 1").fetchone()
+        self.db.execute("DELETE FROM slots WHERE key = ?", (old_key,))
+        return slot
+
+    def _embed(self, texts, kind, compute):
+        keys = [text_key(self.model_id, kind, text) for text in texts]
+        now = time.time()
+
+        with self._lock:
+            found = self._lookup(keys) if self.vectors is not None else {}
+            result = {key: self.vectors[slot].astype(np.float32) for key, slot in found.items()}
+            with self.db:
+                self.db.executemany("UPDATE slots SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in result}
+        misses = sum(1 for key in keys if key in missing)
+        with self._lock:
+            self.hits += len(keys) - misses
+            self.misses += misses
+
+        if missing:
+            computed = np.asarray(compute(list(missing.values())), dtype=np.float32)
+            with self._lock:
+                if self.vectors is None:
+                    self._open(computed.shape[1], self.max_entries)
+                # Another thread may have stored some of these keys meanwhile
+                present = self._lookup(list(missing))
+                with self.db:
+                    for key, vector in zip(missing, computed):
+                        slot = present[key] if key in present else self._allocate()
+                        self.vectors[slot] = vector
+                        self.db.execute("INSERT OR REPLACE INTO slots (key, slot, accessed) VALUES (?, ?, ?)",
+                                        (key, slot, now))
+                self.vectors.flush()
+            result.update(zip(missing, computed))
+
+        return [result[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "document", self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], "query", lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            (entries,) = self.db.execute("SELECT COUNT(*) FROM slots").fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries,
+            }
@@ -0,0 +1,296 @@
+"""Spread LLM calls over several Ollama instances by least outstanding tokens, with health checks.
+
+Endpoints come from OLLAMA_ENDPOINTS, comma-separated, each optionally
+carrying its models and parallel slots:
+
+    OLLAMA_ENDPOINTS="http://localhost:11434|mistral+phi|4,http://localhost:11435|mistral|2"
+
+Without it, the pool holds OLLAMA_HOST alone.
+"""
+
+import os
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+import requests
+
+from async_batch import OLLAMA_NUM_PARALLEL
+from ollama_client import CHAT, CHAT_COMPLETIONS, GENERATE, OLLAMA_HOST, OllamaClient
+
+
+HEALTH_INTERVAL = 10.0  # Seconds between health checks of every endpoint
+HEALTH_TIMEOUT = 2.0
+FAILURE_THRESHOLD = 3  # Consecutive failed calls before an endpoint is pulled until its next good check
+LATENCY_ALPHA = 0.2  # Weight of the newest call in the moving-average latency
+CHARS_PER_TOKEN = 4  # Cheap size estimate for scheduling when the caller gives no token count
+DEFAULT_OUTPUT_TOKENS = 512
+
+
+def model_family(name):
+    return name.split(":")[0]
+
+
+def parse_endpoints(spec):
+    """[(url, models or None, slots)] from an OLLAMA_ENDPOINTS value."""
+    endpoints = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        url, _, rest = item.partition("|")
+        models, _, slots = rest.partition("|")
+        endpoints.append((url, models.split("+") if models else None, int(slots) if slots else OLLAMA_NUM_PARALLEL))
+    return endpoints
+
+
+def estimate_tokens(payload):
+    """Rough prompt plus output tokens of a request, for load accounting only."""
+    text = payload.get("prompt") or "".join(m.get("content", "") for m in payload.get("messages", []))
+    options = payload.get("options") or {}
+    output = options.get("num_predict") or payload.get("max_tokens") or DEFAULT_OUTPUT_TOKENS
+    return len(text) // CHARS_PER_TOKEN + output
+
+
+class Endpoint:
+    """One Ollama instance: its client, models, slot capacity, load and latency."""
+
+    def __init__(self, url, models=None, slots=OLLAMA_NUM_PARALLEL):
+        self.url = url.rstrip("/")
+        self.models = models  # None = discover from /api/tags
+        self.slots = slots
+        self.client = OllamaClient(self.url, pool_size=slots)
+        self.healthy = True
+        self.outstanding_tokens = 0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.latency_total = 0.0
+        self.latency_ewma = None
+        self.latency_max = 0.0
+
+    def serves(self, model):
+        if self.models is None:
+            return True
+        return model in self.models or model_family(model) in {model_family(m) for m in self.models}
+
+    def load(self):
+        """Outstanding tokens per slot; the scheduler picks the lowest."""
+        return self.outstanding_tokens / self.slots
+
+    def stats(self):
+        return {
+            "healthy": self.healthy,
+            "models": self.models,
+            "slots": self.slots,
+            "in_flight": self.in_flight,
+            "outstanding_tokens": self.outstanding_tokens,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_avg": self.latency_total / self.requests if self.requests else None,
+            "latency_ewma": self.latency_ewma,
+            "latency_max": self.latency_max,
+        }
+
+
+class EndpointPool:
+    """Schedule calls over endpoints; offers the same post/stream API as OllamaClient."""
+
+    def __init__(self, endpoints, health_interval=HEALTH_INTERVAL):
+        self.endpoints = [endpoint if isinstance(endpoint, Endpoint) else Endpoint(*endpoint)
+                          for endpoint in endpoints]
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Check every endpoint now, then keep checking on a background thread."""
+        self.check_all()
+        self._thread = threading.Thread(target=self._health_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_all()
+
+    def check(self, endpoint):
+        """Probe /api/tags; refreshes the model list when it was not configured."""
+        try:
+            response = endpoint.client.session.get(endpoint.url + "/api/tags", timeout=HEALTH_TIMEOUT)
+            ok = response.status_code == 200
+            models = [m.get("name") or m.get("model") for m in response.json().get("models", [])] if ok else None
+        except (requests.RequestException, ValueError):
+            ok, models = False, None
+
+        with self._lock:
+            if ok and models is not None and endpoint.models is None:
+                endpoint.models = models
+            if ok != endpoint.healthy:
+                print(f"{'✅' if ok else '❌'} Endpoint {endpoint.url} {'back in' if ok else 'pulled from'} the pool")
+            endpoint.healthy = ok
+            if ok:
+                endpoint.consecutive_failures = 0
+        return ok
+
+    def check_all(self):
+        for endpoint in self.endpoints:
+            self.check(endpoint)
+
+    def capacity(self, model=None):
+        """Parallel slots across the healthy endpoints serving model."""
+        with self._lock:
+            return sum(e.slots for e in self.endpoints if e.healthy and (model is None or e.serves(model))) or 1
+
+    def _pick(self, model, tokens, exclude=()):
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy and e.serves(model) and e not in exclude]
+            if not candidates:
+                # Better a call to a suspect endpoint than no call at all
+                candidates = [e for e in self.endpoints if e.serves(model) and e not in exclude]
+            if not candidates:
+                raise RuntimeError(f"No endpoint serves model {model!r}")
+            endpoint = min(candidates, key=lambda e: (e.load(), e.in_flight))
+            endpoint.outstanding_tokens += tokens
+            endpoint.in_flight += 1
+        return endpoint
+
+    def _release(self, endpoint, tokens, start, failed):
+        duration = time.perf_counter() - start
+        with self._lock:
+            endpoint.outstanding_tokens -= tokens
+            endpoint.in_flight -= 1
+            endpoint.requests += 1
+            endpoint.latency_total += duration
+            endpoint.latency_max = max(endpoint.latency_max, duration)
+            endpoint.latency_ewma = duration if endpoint.latency_ewma is None else (
+                LATENCY_ALPHA * duration + (1 - LATENCY_ALPHA) * endpoint.latency_ewma)
+            if failed:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= FAILURE_THRESHOLD and endpoint.healthy:
+                    endpoint.healthy = False
+                    print(f"❌ Endpoint {endpoint.url} pulled from the pool after {FAILURE_THRESHOLD} failures")
+            else:
+                endpoint.consecutive_failures = 0
+                # A pulled endpoint that answers is back, even with no health loop running
+                if not endpoint.healthy:
+                    endpoint.healthy = True
+                    print(f"✅ Endpoint {endpoint.url} back in the pool")
+
+    @contextmanager
+    def lease(self, model, tokens, exclude=()):
+        """Reserve the least loaded endpoint for one call; exceptions count as failures.
+
+        Endpoints in exclude (e.g. ones that just failed this call) are passed
+        over unless nothing else serves model.
+        """
+        if len(set(exclude)) >= self._serving(model):
+            exclude = ()
+        endpoint = self._pick(model, tokens, exclude)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield endpoint
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(endpoint, tokens, start, failed)
+
+    @asynccontextmanager
+    async def alease(self, model, tokens, exclude=()):
+        """Async variant of lease, for callers on an event loop."""
+        with self.lease(model, tokens, exclude) as endpoint:
+            yield endpoint
+
+    def _serving(self, model):
+        return sum(1 for endpoint in self.endpoints if endpoint.serves(model))
+
+    def post(self, path, payload):
+        """Send to the least loaded endpoint, failing over to the others on request errors and timeouts."""
+        model = payload.get("model", "")
+        tokens = estimate_tokens(payload)
+        tried = []
+        while True:
+            endpoint = self._pick(model, tokens, exclude=tried)
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = endpoint.client.post(path, payload)
+                failed = response.status_code >= 500
+                return response
+            except requests.RequestException:
+                tried.append(endpoint)
+                if len(tried) >= self._serving(model):
+                    raise
+            finally:
+                self._release(endpoint, tokens, start, failed)
+
+    @contextmanager
+    def stream(self, path, payload):
+        """Streaming request on the least loaded endpoint; fails over only before the response starts."""
+        model = payload.get("model", "")
+        tokens = estimate_tokens(payload)
+        tried = []
+        stack = ExitStack()
+        while True:
+            endpoint = self._pick(model, tokens, exclude=tried)
+            start = time.perf_counter()
+            try:
+                response = stack.enter_context(endpoint.client.stream(path, payload))
+                break
+            except Exception as error:
+                self._release(endpoint, tokens, start, failed=True)
+                if not isinstance(error, requests.RequestException):
+                    raise
+                tried.append(endpoint)
+                if len(tried) >= self._serving(model):
+                    raise
+
+        failed = response.status_code >= 500
+        with stack:
+            try:
+                yield response
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self._release(endpoint, tokens, start, failed)
+
+    def generate(self, payload):
+        return self.post(GENERATE, dict(payload, stream=False))
+
+    def chat(self, payload):
+        return self.post(CHAT, dict(payload, stream=False))
+
+    def chat_completions(self, payload):
+        return self.post(CHAT_COMPLETIONS, payload)
+
+    def stats(self):
+        with self._lock:
+            return {endpoint.url: endpoint.stats() for endpoint in self.endpoints}
+
+    def close(self):
+        self.stop()
+        for endpoint in self.endpoints:
+            endpoint.client.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool built from OLLAMA_ENDPOINTS, or OLLAMA_HOST alone."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            spec = os.environ.get("OLLAMA_ENDPOINTS")
+            endpoints = parse_endpoints(spec) if spec else [(OLLAMA_HOST, None, OLLAMA_NUM_PARALLEL)]
+            _pool = EndpointPool(endpoints)
+            if len(_pool.endpoints) > 1:
+                _pool.start()
+        return _pool
@@ -0,0 +1,166 @@
+"""Deterministic key/value pre-parser: fills schema fields locally so the LLM only sees what is left.
+
+Handles `key: value` and `key=value` pairs separated by commas, periods,
+semicolons, newlines or spaces, plus bare or bracketed timestamps. Keys are
+mapped to schema fields through SYNONYMS.
+"""
+
+import re
+
+from log_schema import SERVER_LOG_SCHEMA, validate
+from prompt_compiler import compact_json
+from result_sinks import flatten_schema
+
+
+TIMESTAMP = re.compile(r"\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\]?")
+FIELD_SEPARATOR = re.compile(r",\s+|\.\s+|;\s*|\n|\s+(?=[A-Za-z][\w-]*\s*=)")
+PAIR = re.compile(r"([A-Za-z][\w .-]*?)\s*[:=]\s*(.*)", re.DOTALL)
+
+# Normalized key (lowercase, words separated by single spaces) -> dotted schema field
+SYNONYMS = {
+    "timestamp": "timestamp", "time": "timestamp", "date": "timestamp", "ts": "timestamp",
+    "cpu": "server.cpu", "processor": "server.cpu", "cpu model": "server.cpu",
+    "memory": "server.memory", "mem": "server.memory", "ram": "server.memory",
+    "disk": "server.disk", "storage": "server.disk", "drive": "server.disk",
+    "status": "status.state", "state": "status.state",
+    "temperature": "status.temperature", "temp": "status.temperature",
+    "alert": "status.alert_level", "alert level": "status.alert_level", "severity": "status.alert_level",
+}
+FILL_OUTPUT_TOKENS_PER_FIELD = 12  # Output estimate for one filled field, key and value
+
+
+def normalize_key(key):
+    return " ".join(re.sub(r"[_-]+", " ", key.lower()).split())
+
+
+def schema_field(key, synonyms=SYNONYMS):
+    """Dotted field for a raw key; "Server CPU" falls back to its trailing words, "cpu"."""
+    words = normalize_key(key).split()
+    for start in range(len(words)):
+        field = synonyms.get(" ".join(words[start:]))
+        if field is not None:
+            return field
+    return None
+
+
+def set_field(record, field, value):
+    keys = field.split(".")
+    for key in keys[:-1]:
+        record = record.setdefault(key, {})
+    record[keys[-1]] = value
+
+
+class PreParser:
+    """Map log text to schema fields without a model; counts how often that was enough."""
+
+    def __init__(self, schema=SERVER_LOG_SCHEMA, synonyms=SYNONYMS):
+        self.fields = dict(flatten_schema(schema))
+        self.synonyms = synonyms
+        self.lines = 0
+        self.complete = 0
+        self.partial = 0
+        self.unparsed = 0
+        self.fields_filled = 0
+
+    def coerce(self, field, value):
+        """Value as the schema wants it (enum casing), or None if it does not validate."""
+        value = value.strip().strip("\"'").rstrip(".").strip()
+        schema = self.fields[field]
+        for option in schema.get("enum", []):
+            if option.lower() == value.lower():
+                value = option
+        if not value or validate(value, schema):
+            return None
+        return value
+
+    def parse(self, text):
+        """(record, missing fields, unresolved text); record is None when nothing beyond a timestamp was filled."""
+        record = {}
+        unresolved = []
+
+        match = TIMESTAMP.search(text)
+        if match and "timestamp" in self.fields:
+            set_field(record, "timestamp", match.group(1).replace("T", " "))
+            text = text[:match.start()] + text[match.end():]
+
+        for part in FIELD_SEPARATOR.split(text.strip().rstrip(".")):
+            part = part.strip()
+            pair = PAIR.fullmatch(part)
+            if not pair:
+                if part:
+                    unresolved.append(part)
+                continue
+            key, value = pair.groups()
+            field = schema_field(key, self.synonyms)
+            if field == "timestamp" and "timestamp" in record:
+                continue  # Already taken from the timestamp pattern
+            value = self.coerce(field, value) if field in self.fields else None
+            if value is None:
+                unresolved.append(part)
+            else:
+                set_field(record, field, value)
+
+        missing = [field for field in self.fields if not _has(record, field)]
+        self.lines += 1
+        # A timestamp alone says nothing about the rest: free text gets the full prompt
+        if set(self.fields) - set(missing) <= {"timestamp"}:
+            self.unparsed += 1
+            return None, list(self.fields), ", ".join(unresolved)
+        self.fields_filled += len(self.fields) - len(missing)
+        if missing:
+            self.partial += 1
+        else:
+            self.complete += 1
+        return record, missing, ", ".join(unresolved)
+
+    def merge(self, record, missing, answer):
+        """Add the LLM's values for missing fields to record; returns the fields still missing."""
+        still_missing = []
+        for field in missing:
+            value = answer.get(field) if isinstance(answer, dict) else None
+            value = self.coerce(field, str(value)) if value is not None else None
+            if value is None:
+                still_missing.append(field)
+            else:
+                set_field(record, field, value)
+        return still_missing
+
+    def rejects(self, missing, answer):
+        """Fields of missing the answer gave a value for that merge would throw away."""
+        if not isinstance(answer, dict):
+            return list(missing)
+        return [field for field in missing
+                if answer.get(field) is not None and self.coerce(field, str(answer[field])) is None]
+
+    def stats(self):
+        return {
+            "lines": self.lines,
+            "complete": self.complete,
+            "partial": self.partial,
+            "unparsed": self.unparsed,
+            "local_field_rate": self.fields_filled / (self.lines * len(self.fields)) if self.lines else 0.0,
+        }
+
+
+def _has(record, field):
+    value = record
+    for key in field.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return False
+        value = value[key]
+    return True
+
+
+def build_fill_request(items):
+    """One compact line per (missing fields, unresolved text) item, numbered so answers can be matched."""
+    return "Texts:\n" + "\n".join(
+        compact_json({"i": i, "fields": missing, "text": text}) for i, (missing, text) in enumerate(items))
+
+
+def fill_format(schema=SERVER_LOG_SCHEMA):
+    """Ollama `format` for fill answers: [{"i": n, "<field>": value or null, ...}]."""
+    properties = {"i": {"type": "integer"}}
+    for field, subschema in flatten_schema(schema):
+        value = {key: val for key, val in subschema.items() if key != "pattern"}
+        properties[field] = {"anyOf": [value, {"type": "null"}]}
+    return {"type": "array", "items": {"type": "object", "properties": properties, "required": ["i"]}}
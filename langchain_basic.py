@@ -1,14 +1,34 @@
+import asyncio
 import json
 import time
 from langchain_ollama import ChatOllama
-from langchain.prompts import PromptTemplate
-from concurrent.futures import ThreadPoolExecutor
-from multiprocessing import cpu_count
+from langchain.prompts import ChatPromptTemplate
+from ollama_client import OLLAMA_HOST
+from async_batch import AsyncBatchEngine
+from concurrency import is_overload, limiter_for, observe, use_limiter
+from endpoint_pool import get_pool
+from kv_parser import FILL_OUTPUT_TOKENS_PER_FIELD, PreParser, build_fill_request, fill_format
+from log_dedup import dedup_ratio, group_lines
+from log_templates import TemplateMiner
+from log_schema import validate_record
+from model_router import CascadeRouter
+from prefix_cache import KEEP_ALIVE, PrefixReuseTracker
+from prompts import BATCH_OUTPUT_FORMAT, BATCH_PREFIX, FILL_PREFIX, build_batch_request
+from record_retry import RetryLane, align_records, salvage_records
+from response_cache import cache_key, get_cache
+from result_sinks import ListSink, StdoutSink
+from token_batcher import OUTPUT_TOKENS_PER_LINE, TokenBudget, budget_for, context_size, pack_batches
+from telemetry import get_telemetry, stage
+from tokenizer import PromptCounter, TokenAccounting, count_static, count_tokens
 
 
 MODEL_NAME = "mistral"
-CHUNK_SIZE = 5  # Logs per batch
+CASCADE_MODELS = ["phi", MODEL_NAME]  # Small model first; escalate on schema failures
 TIMEOUT = 60  # Timeout per LLM call
+BUDGET = budget_for(MODEL_NAME, TIMEOUT)  # Prompt/output tokens per batch, output decodable within TIMEOUT
+DEDUP_WINDOW = 10_000  # Lines grouped and held in memory at a time
+OUTPUT_FORMAT = BATCH_OUTPUT_FORMAT  # Grammar Ollama constrains decoding to
+FILL_FORMAT = fill_format()  # Grammar for answers that fill only missing fields
 
 
 logs = [
@@ -19,137 +39,519 @@ logs = [
 ]
 
 
-def get_llm():
-    """Initialize the local Mistral model."""
-    return ChatOllama(model=MODEL_NAME, temperature=0.2, timeout=TIMEOUT)
+def get_llm(model=MODEL_NAME, base_url=OLLAMA_HOST, output_format=OUTPUT_FORMAT):
+    """Initialize a local model, Mistral by default."""
+    budget = budget_for(model, TIMEOUT)
+    return ChatOllama(
+        model=model,
+        temperature=0.2,
+        timeout=TIMEOUT,
+        base_url=base_url,
+        num_ctx=context_size(budget),
+        num_predict=budget.output_tokens,
+        keep_alive=KEEP_ALIVE,
+        format=output_format,
+    )
+
+
+def build_prefix():
+    """Static context, schema and examples; byte-identical on every call so Ollama can reuse its KV cache."""
+    return BATCH_PREFIX.compile()
+
+
+STATIC_PREFIX = build_prefix()
+PROMPT = ChatPromptTemplate.from_messages([("system", "{prefix}"), ("human", "{prompt}")])
 
 
 def build_prompt(log_chunk):
-    """Create multi-step prompt for better context."""
+    """Per-batch part of the prompt: only the logs, sent after the static prefix."""
+    return build_batch_request(log_chunk)
 
-    context = """
-    You are an expert log parser. Your task is to map server logs to a given JSON schema.
-    The logs contain information about server hardware, status, and alerts.
-    Extract the relevant attributes and map them to the schema accurately.
-    """
 
-    schema = """
-    Schema:
-    {
-        "timestamp": "ISO 8601 format",
-        "server": {
-            "cpu": "CPU model",
-            "memory": "RAM size",
-            "disk": "Storage type"
-        },
-        "status": {
-            "state": "Running | Idle | Down | Overload",
-            "temperature": "Numeric with °C",
-            "alert_level": "None | Low | Medium | High | Critical"
-        }
-    }
-    """
+PREFIX_TOKENS = count_static(STATIC_PREFIX, MODEL_NAME)
+# Static prefix and instruction counted once; each batch only encodes its log lines
+PROMPT_COUNTER = PromptCounter([STATIC_PREFIX, build_prompt([])], MODEL_NAME)
+prefix_tracker = PrefixReuseTracker(PREFIX_TOKENS)
+token_accounting = TokenAccounting()
+retry_lane = RetryLane()
+FILL_STATIC = FILL_PREFIX.compile()
+pre_parser = PreParser()
 
-    examples = """
-    Examples:
-    Log: "2025-03-20 15:30:45 Server CPU: Intel Xeon E5-2670, Memory: 64GB DDR4, Disk: 512GB SSD. Status: Running, Temperature: 45°C, Alert: None."
-    Output:
-    {
-        "timestamp": "2025-03-20 15:30:45",
-        "server": {
-            "cpu": "Intel Xeon E5-2670",
-            "memory": "64GB DDR4",
-            "disk": "512GB SSD"
-        },
-        "status": {
-            "state": "Running",
-            "temperature": "45°C",
-            "alert_level": "None"
-        }
-    }
-    """
 
-    logs_str = "\n".join(log_chunk)
+def record_prefix_reuse(chunk, prompt, result):
+    """Check prompt_eval_count to confirm the static prefix came from the KV cache."""
+    prompt_tokens = getattr(chunk, "prompt_tokens", None) or PROMPT_COUNTER.count(chunk)
+    output_tokens = getattr(chunk, "output_tokens", None) or OUTPUT_TOKENS_PER_LINE * len(chunk)
+    metadata = getattr(result, "response_metadata", None)
+    prefix_tracker.record(prompt_tokens, metadata)
+    token_accounting.record(prompt_tokens, output_tokens, metadata)
 
-    request = f"""
-    {context}
 
-    {schema}
+def record_timings(llm, result, duration):
+    """Send Ollama's load/prompt-eval/eval timings for one call to telemetry."""
+    metadata = getattr(result, "response_metadata", None)
+    get_telemetry().record(metadata, llm.model, llm.base_url, wall_seconds=duration)
 
-    {examples}
 
-    Logs to Process:
-    {logs_str}
+def llm_cache_key(llm, prompt):
+    """Response cache key for one batch: model, full prompt and generation options."""
+    options = {"temperature": llm.temperature, "num_ctx": llm.num_ctx, "num_predict": llm.num_predict,
+               "format": llm.format}
+    return cache_key(llm.model, STATIC_PREFIX + prompt, options)
 
-    Now, process the logs and map them to the schema using the same format as the examples.
-    Output the result as a JSON array.
+
+def parse_output(result):
+    """Parse the LLM's JSON output, keeping every record that parses.
+
+    Returns (records, complete); complete is False when part of the output was
+    malformed or truncated, and such answers are never cached.
     """
+    output_text = result.content if hasattr(result, "content") else str(result)
 
-    return request
+    records, complete = salvage_records(output_text)
+    if not complete:
+        print(f"⚠️ Malformed JSON output, salvaged {len(records)} record(s).")
+    return records, complete
 
 
-def process_chunk(chunk, llm):
-    """Processes a batch of logs using multi-step prompting."""
+async def aprocess_chunk(chunk, llm, validate=None, use_cache=True, raise_errors=False):
+    """Map one batch of logs with ChatOllama.ainvoke after the static prefix.
+
+    Answers are cached only when every record passes validate, so a retry
+    never gets the same rejected answer back; use_cache=False skips the lookup.
+    A failed call returns no records, or raises with raise_errors.
+    """
 
     prompt = build_prompt(chunk)
 
-    template = PromptTemplate(input_variables=["prompt"], template="{prompt}")
+    key = llm_cache_key(llm, prompt)
+    cached = get_cache().get(key) if use_cache else None
+    if cached is not None:
+        return parse_output(cached)[0]
 
-    chain = template | llm
+    chain = PROMPT | llm
 
+    start_time = time.time()
     try:
-        start_time = time.time()
-
-        result = chain.invoke({"prompt": prompt})
+        result = await chain.ainvoke({"prefix": STATIC_PREFIX, "prompt": prompt})
 
         duration = time.time() - start_time
         print(f"✅ Batch processed in {duration:.2f} seconds.")
+        observe(duration, key=llm.model, units=len(chunk))
+        record_prefix_reuse(chunk, prompt, result)
+        record_timings(llm, result, duration)
 
         output_text = result.content if hasattr(result, "content") else str(result)
+        parsed_output, complete = parse_output(output_text)
 
-        # Parse the output JSON safely
-        try:
-            parsed_output = json.loads(output_text)
-        except json.JSONDecodeError:
-            print("❌ Invalid JSON format, skipping batch.")
-            parsed_output = []
+        # Never replay a malformed or rejected answer from the cache
+        valid = validate is None or not any(validate(record) for record in parsed_output)
+        if complete and parsed_output and valid:
+            get_cache().set(key, output_text)
 
         return parsed_output
 
     except Exception as e:
         print(f"❌ Exception during LLM processing: {e}")
+        if is_overload(e):
+            observe(time.time() - start_time, overloaded=True, key=llm.model)
+        if raise_errors:
+            raise
         return []
 
 
-def batch_process_logs(logs, chunk_size=CHUNK_SIZE):
-    """Batch processes logs using parallel execution."""
-    llm = get_llm()
-    batches = [logs[i:i + chunk_size] for i in range(0, len(logs), chunk_size)]
+async def amap_lines(lines, process, validate=None):
+    """Map lines with one model; returns (index, record) pairs.
 
-    results = []
+    process(chunk, validate, use_cache) maps one batch, like aprocess_chunk
+    bound to an llm. Records are matched to lines by timestamp or position,
+    and only the lines left without one go to retry_lane. With validate,
+    records failing it are retried too; if no retry passes, the first answer
+    is kept.
+    """
+    rejected = {}
+
+    async def attempt(indices, use_cache=True):
+        mapped = await process([lines[i] for i in indices], validate, use_cache)
+        if not isinstance(mapped, list):
+            mapped = [mapped]
 
-    max_workers = max(1, cpu_count() // 2)
+        pairs, missing = align_records([lines[i] for i in indices], mapped)
+        accepted = []
+        for index, record in pairs:
+            if validate is not None and validate(record):
+                rejected.setdefault(indices[index], record)
+                missing.append(index)
+            else:
+                accepted.append((indices[index], record))
+        return accepted, [indices[index] for index in missing]
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(process_chunk, batch, llm) for batch in batches]
+    pairs, missing = await attempt(list(range(len(lines))))
+    if missing:
+        print(f"🔁 Retrying {len(missing)} of {len(lines)} line(s)")
+        with stage("retry"):
+            # A retry must reach the model: a cached answer would just fail the same way
+            retried, missing = await retry_lane.run(sorted(missing), lambda indices: attempt(indices, False))
+        pairs.extend(retried)
 
-        for future in futures:
-            try:
-                results.extend(future.result())
-            except Exception as e:
-                print(f"❌ Failed to process batch: {e}")
+    pairs.extend((index, rejected[index]) for index in missing if index in rejected)
+    return sorted(pairs, key=lambda pair: pair[0])
+
+
+_llms = {}  # Event loop -> {(url, model, format): ChatOllama}
+
+
+def llm_for(endpoint, model, output_format=OUTPUT_FORMAT):
+    """ChatOllama for model and output format on one pool endpoint, created once per event loop.
+
+    Its async HTTP client is bound to the loop it first ran on, and every
+    batch_process_logs call runs on a new loop.
+    """
+    for loop in [loop for loop in _llms if loop.is_closed()]:
+        del _llms[loop]
+    llms = _llms.setdefault(asyncio.get_running_loop(), {})
+    key = (endpoint.url, model, json.dumps(output_format, sort_keys=True))
+    if key not in llms:
+        llms[key] = get_llm(model, endpoint.url, output_format)
+    return llms[key]
+
+
+async def amap_lines_balanced(lines, model=MODEL_NAME, validate=None):
+    """amap_lines over the pool: the first call and every retry lease the least loaded endpoint serving model.
+
+    A failed call counts against its endpoint, which the retries of these
+    lines then pass over while another endpoint serves model.
+    """
+    failed = []
+
+    async def process(chunk, validate, use_cache):
+        tokens = PROMPT_COUNTER.count(chunk) + OUTPUT_TOKENS_PER_LINE * len(chunk)
+        endpoint = None
+        try:
+            async with get_pool().alease(model, tokens, exclude=failed) as endpoint:
+                return await aprocess_chunk(chunk, llm_for(endpoint, model), validate, use_cache, raise_errors=True)
+        except Exception:
+            if endpoint is None:
+                raise  # No endpoint serves model
+            failed.append(endpoint)
+            return []
+
+    return await amap_lines(lines, process, validate)
+
+
+async def afill_fields(items, llm, raise_errors=False):
+    """Ask the LLM for just the missing fields of (missing fields, unresolved text) items.
+
+    Returns {item index: answer object}; items the answer left out are absent.
+    A failed call returns no answers, or raises with raise_errors.
+    """
+    request = build_fill_request(items)
+    key = llm_cache_key(llm, FILL_STATIC + request)
+    output_text = get_cache().get(key)
+
+    if output_text is None:
+        chain = PROMPT | llm
+        start_time = time.time()
+        try:
+            result = await chain.ainvoke({"prefix": FILL_STATIC, "prompt": request})
+        except Exception as e:
+            print(f"❌ Exception during LLM fill: {e}")
+            if is_overload(e):
+                observe(time.time() - start_time, overloaded=True, key=llm.model + ":fill")
+            if raise_errors:
+                raise
+            return {}
+
+        duration = time.time() - start_time
+        fields = sum(len(missing) for missing, _ in items)
+        print(f"✅ Filled {fields} field(s) of {len(items)} line(s) in {duration:.2f} seconds.")
+        observe(duration, key=llm.model + ":fill", units=len(items))
+        record_timings(llm, result, duration)
+        prompt_tokens = count_static(FILL_STATIC, llm.model) + count_tokens(request, llm.model)
+        token_accounting.record(prompt_tokens, FILL_OUTPUT_TOKENS_PER_FIELD * fields,
+                                getattr(result, "response_metadata", None))
+
+        output_text = result.content if hasattr(result, "content") else str(result)
+        answers, complete = parse_output(output_text)
+        by_item = answers_by_item(answers)
+        # Only cache answers merge keeps every value of
+        rejected = any(i not in by_item or pre_parser.rejects(missing, by_item[i])
+                       for i, (missing, _) in enumerate(items))
+        if complete and not rejected:
+            get_cache().set(key, output_text)
+        return by_item
+
+    return answers_by_item(parse_output(output_text)[0])
+
+
+def answers_by_item(answers):
+    return {answer["i"]: answer for answer in answers if isinstance(answer, dict) and isinstance(answer.get("i"), int)}
+
+
+async def afill_balanced(items, model=MODEL_NAME):
+    """afill_fields on the endpoint serving model with the fewest outstanding tokens; a failed call counts against it."""
+    tokens = (count_static(FILL_STATIC, model) + count_tokens(build_fill_request(items), model)
+              + FILL_OUTPUT_TOKENS_PER_FIELD * sum(len(missing) for missing, _ in items))
+    endpoint = None
+    try:
+        async with get_pool().alease(model, tokens) as endpoint:
+            return await afill_fields(items, llm_for(endpoint, model, FILL_FORMAT), raise_errors=True)
+    except Exception:
+        if endpoint is None:
+            raise  # No endpoint serves model
+        return {}
+
+
+def hybrid_mapper(mapper, model=MODEL_NAME, validate=validate_record):
+    """Wrap mapper so lines are parsed locally first and the LLM only fills what is missing.
+
+    Lines pre_parser completes skip the LLM. Partial ones send just their
+    missing fields and unresolved text to model. Every record must still pass
+    validate; lines pre_parser cannot read, records left invalid and fills
+    that get no answer go to mapper (e.g. the cascade) with the full prompt.
+    """
+    async def map_lines(lines):
+        pairs = []
+        fill = []
+        full = []
+        for index, line in enumerate(lines):
+            record, missing, unresolved = pre_parser.parse(line)
+            if record is None:
+                full.append(index)
+            elif missing and unresolved:
+                fill.append((index, record, missing, unresolved))
+            elif validate(record):
+                full.append(index)
+            else:
+                pairs.append((index, record))
+
+        if fill:
+            with stage("fill"):
+                answers = await afill_balanced([(missing, unresolved) for _, _, missing, unresolved in fill], model)
+            for i, (index, record, missing, _) in enumerate(fill):
+                if i in answers:
+                    pre_parser.merge(record, missing, answers[i])
+                if i in answers and not validate(record):
+                    pairs.append((index, record))
+                else:
+                    full.append(index)
+
+        if full:
+            for i, record in await mapper([lines[index] for index in full]):
+                pairs.append((full[i] if i is not None else None, record))
+        return pairs
+
+    return map_lines
+
+
+def get_cascade(models=CASCADE_MODELS):
+    """Router that tries the small model first and escalates records failing the schema."""
+    return CascadeRouter(models, lambda model, lines: amap_lines_balanced(lines, model))
+
+
+async def amap_chunk(chunk, mapper, miner=None):
+    """Map one batch, sending only lines with an unseen template to the LLM.
+
+    Returns (offset, line, record) triples; offset and line are None for
+    records that could not be lined up with their input.
+    """
+    offsets = getattr(chunk, "offsets", None) or range(len(chunk))
+    results = []
+    pending = []
+
+    for offset, log in zip(offsets, chunk):
+        record = miner.extract(log) if miner is not None else None
+        if record is None:
+            pending.append((offset, log))
+        else:
+            results.append((offset, log, record))
+
+    if not pending:
+        return results
+
+    for index, record in await mapper([log for _, log in pending]):
+        if index is None:
+            results.append((None, None, record))
+            continue
+        offset, log = pending[index]
+        results.append((offset, log, record))
+        if miner is not None:
+            miner.learn(log, record)
 
     return results
 
 
-# ✅ Execution
-start = time.time()
-mapped_logs = batch_process_logs(logs)
-end = time.time()
+async def amap_batches(batches, mapper, miner=None, limiter=None):
+    """Map a plain or async iterable of log batches on one event loop.
+
+    LLM calls in flight are bounded by limiter, an AIMDLimiter that adapts
+    to the latency each call reports (see run_limiter). With a
+    TemplateMiner, lines whose template was already mapped are extracted
+    locally. Yields (offset, line, record) as each batch finishes, so one
+    slow batch never holds up the others.
+    """
+    engine = AsyncBatchEngine(lambda chunk: amap_chunk(chunk, mapper, miner), limiter=limiter)
+
+    async for _, batch, mapped in engine.run(batches):
+        if isinstance(mapped, Exception):
+            print(f"❌ Failed to process batch: {mapped}")
+            continue
+        if hasattr(batch, "usage"):
+            print(f"📦 Batch tokens: {batch.usage()}")
+        for item in mapped:
+            yield item
+
 
-print("\n🔥 Mapped Logs to Schema:")
-print(json.dumps(mapped_logs, indent=4))
-print(f"\n🚀 Processed {len(logs)} logs in {end - start:.2f} seconds.")
+def iter_windows(logs, size=DEDUP_WINDOW, start=0):
+    """Yield (first offset, lines) windows so memory stays bounded for any input size.
+
+    A None in logs closes the current window early, so a live stream's lines
+    are processed when it goes idle instead of waiting for a full window.
+    """
+    window = []
+    for line in logs:
+        if line is not None:
+            window.append(line)
+        if window and (line is None or len(window) >= size):
+            yield start, window
+            start += len(window)
+            window = []
+    if window:
+        yield start, window
+
+
+def run_limiter(model=MODEL_NAME, max_in_flight=None):
+    """Fresh AIMD limiter for one run, sized to the parallel slots of the endpoints serving model."""
+    return limiter_for(get_pool().capacity(model), max_in_flight)
+
+
+async def amap_logs(logs, sink, budget=BUDGET, miner=None, max_in_flight=None, dedup=True,
+                    router=None, first_offset=0, on_window=None, hybrid=False, limiter=None):
+    """Map logs to the schema, writing each record to sink as soon as it is ready.
+
+    With dedup, one representative per masked group is sent and its mapping
+    is projected onto the rest of the group. With a CascadeRouter, batches go
+    to its models in order instead of to MODEL_NAME alone. Offsets count from
+    first_offset; on_window(end offset) is called once every line before that
+    offset has been written and flushed. Each run gets its own adaptive
+    limiter unless one is passed; max_in_flight is where its limit starts,
+    by default the parallel slots of the endpoints serving the model. With
+    hybrid (opt-in), key/value text is parsed locally and MODEL_NAME only
+    fills the fields left missing; records that still fail validation go to
+    the regular mapper or cascade.
+    """
+    if router is None:
+        mapper = lambda lines: amap_lines_balanced(lines, MODEL_NAME, validate_record)
+        model = MODEL_NAME
+    else:
+        mapper = router.map_lines
+        budgets = [budget_for(model, TIMEOUT) for model in router.models]
+        budget = TokenBudget(min(b.prompt_tokens for b in budgets), min(b.output_tokens for b in budgets))
+        model = router.models[0]
+    limiter = limiter or run_limiter(model, max_in_flight)
+    if hybrid:
+        mapper = hybrid_mapper(mapper, MODEL_NAME)
+    overhead = PROMPT_COUNTER.static_tokens
+
+    def batches(lines, offsets):
+        return pack_batches(lines, overhead, budget, offsets=offsets)
+
+    with use_limiter(limiter):
+        for start, window in iter_windows(logs, start=first_offset):
+            sink.begin_window(start)
+            await amap_window(window, range(start, start + len(window)), sink, batches, mapper, miner, dedup,
+                              limiter)
+            if on_window is not None:
+                on_window(start + len(window))
+
+
+async def amap_window(window, offsets, sink, batches, mapper, miner, dedup, limiter):
+    """Map one window of lines; every record is written and flushed before returning."""
+    if not dedup:
+        async for offset, _, record in amap_batches(batches(window, offsets), mapper, miner, limiter):
+            sink.write(offset, record)
+        sink.flush()
+        return
+
+    groups = group_lines(window, offsets)
+    print(f"🧬 {len(window)} logs in {len(groups)} groups ({dedup_ratio(groups):.1f}:1)")
+
+    by_offset = {group.offsets[0]: group for group in groups}
+    representatives = [group.representative for group in groups]
+    first_offsets = [group.offsets[0] for group in groups]
+    leftovers = []
+
+    async for offset, _, record in amap_batches(batches(representatives, first_offsets), mapper, miner, limiter):
+        group = by_offset.pop(offset, None)
+        if group is None:
+            sink.write(offset, record)
+            continue
+        records, unmatched = group.project(record)
+        for member_offset, member_record in records:
+            sink.write(member_offset, member_record)
+        leftovers.extend(unmatched)
+    sink.flush()
+
+    # Members of groups whose representative got no usable record
+    for group in by_offset.values():
+        leftovers.extend(zip(group.offsets[1:], group.members[1:]))
+
+    # Members the representative's mapping could not be projected onto
+    if leftovers:
+        leftovers.sort()
+        lines = [line for _, line in leftovers]
+        offsets = [offset for offset, _ in leftovers]
+        async for offset, _, record in amap_batches(batches(lines, offsets), mapper, miner, limiter):
+            sink.write(offset, record)
+        sink.flush()
+
+
+def batch_process_logs(logs, sink=None, budget=BUDGET, miner=None, max_in_flight=None, dedup=True,
+                       router=None, first_offset=0, on_window=None, hybrid=False, limiter=None):
+    """Batch processes logs concurrently with bounded in-flight LLM calls.
+
+    Batches are packed up to the model's token budget, so the static prompt
+    overhead is shared by as many lines as fit. With dedup, lines differing
+    only in timestamps, numbers, IDs or IPs share one LLM call.
+
+    Records are streamed to sink as batches finish; without a sink they are
+    collected and returned in source order.
+    """
+    collect = sink is None
+    if collect:
+        sink = ListSink()
+
+    asyncio.run(amap_logs(logs, sink, budget, miner, max_in_flight, dedup, router, first_offset, on_window,
+                          hybrid, limiter))
+
+    if collect:
+        return sink.records()
+    return None
+
+
+if __name__ == "__main__":
+    start = time.time()
+    template_miner = TemplateMiner()
+    cascade = get_cascade()
+    limiter = run_limiter(cascade.models[0])
+
+    # Records go to stdout as NDJSON; everything printed inside the block goes to stderr
+    with StdoutSink() as output:
+        print("\n🔥 Mapping Logs to Schema (NDJSON on stdout)")
+        batch_process_logs(logs, sink=output, miner=template_miner, router=cascade, hybrid=True, limiter=limiter)
+        end = time.time()
+
+        print(f"\n🚀 Processed {len(logs)} logs in {end - start:.2f} seconds.")
+        print(f"🧩 Templates: {template_miner.stats()}")
+        print(f"🔑 Pre-parser: {pre_parser.stats()}")
+        print(f"🪜 Cascade: {cascade.summary()}")
+        print(f"🧠 Prefix Reuse: {prefix_tracker.stats()}")
+        print(f"📏 Token Accounting: {token_accounting.stats()}")
+        print(f"🔁 Retry Lane: {retry_lane.stats()}")
+        print(f"💾 Response Cache: {get_cache().stats()}")
+        print(f"🌐 Endpoints: {get_pool().stats()}")
+        print(f"🎚️ Concurrency: {limiter.stats()}")
+        print(f"📡 Telemetry: {get_telemetry().summary()}")
 
 
 """
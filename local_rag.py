@@ -1,15 +1,21 @@
 import json
 import time
-import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
 from langchain_ollama import ChatOllama
 from langchain.prompts import PromptTemplate
+from async_batch import OLLAMA_NUM_PARALLEL
+from embedding_cache import CachedEmbeddings
+from prompts import RAG_SCHEMA, build_rag_prompt
+from ollama_client import OLLAMA_HOST
+from record_retry import RetryLane, salvage_records
+from schema_index import load_schema_index
+from telemetry import get_telemetry
 
 LOCAL_MODEL_PATH = "Projects/model/sentence-transformers/all-MiniLM-L6-v2"
 MISTRAL_MODEL = "mistral"
-CHUNK_SIZE = 5  # Logs per batch
+CHUNK_SIZE = 256  # Logs embedded and searched per retrieval call
 TIMEOUT = 60  # Timeout per LLM call
 
 FAISS_INDEX_FILE = "faiss_index"
@@ -17,43 +23,7 @@ FAISS_INDEX_FILE = "faiss_index"
 # ---------------------------------
 # Sample Schema and Examples
 # ---------------------------------
-schemas = [
-    {
-        "name": "Server Logs",
-        "content": """
-        Schema:
-        {
-            "timestamp": "ISO 8601 format",
-            "server": {
-                "cpu": "CPU model",
-                "memory": "RAM size",
-                "disk": "Storage type"
-            },
-            "status": {
-                "state": "Running | Idle | Down | Overload",
-                "temperature": "Numeric with °C",
-                "alert_level": "None | Low | Medium | High | Critical"
-            }
-        }
-        Examples:
-        Log: "2025-03-20 15:30:45 Server CPU: Intel Xeon E5-2670, Memory: 64GB DDR4, Disk: 512GB SSD. Status: Running, Temperature: 45°C, Alert: None."
-        Output:
-        {
-            "timestamp": "2025-03-20 15:30:45",
-            "server": {
-                "cpu": "Intel Xeon E5-2670",
-                "memory": "64GB DDR4",
-                "disk": "512GB SSD"
-            },
-            "status": {
-                "state": "Running",
-                "temperature": "45°C",
-                "alert_level": "None"
-            }
-        }
-        """
-    }
-]
+schemas = [{"name": "Server Logs", "content": RAG_SCHEMA.compile()}]
 
 # Sample Logs
 logs = [
@@ -68,80 +38,108 @@ logs = [
 # Local Embedding Model + FAISS Setup
 # ---------------------------------
 def create_faiss_index(schemas, index_file=FAISS_INDEX_FILE):
-    """Index schemas in FAISS and save to disk."""
-
-    # Use local embeddings
-    embeddings = HuggingFaceEmbeddings(model_name=LOCAL_MODEL_PATH)
-
-    if os.path.exists(index_file):
-        # Load FAISS index from disk with deserialization enabled
-        print(f"🔥 Loading FAISS index from {index_file}")
-        db = FAISS.load_local(index_file, embeddings, allow_dangerous_deserialization=True)
-    else:
-        print("🚀 Indexing schemas...")
-        docs = [Document(page_content=schema["content"]) for schema in schemas]
-
-        # Create new FAISS index
-        db = FAISS.from_documents(docs, embeddings)
+    """Open the schema index, embedding only schemas added or changed since the last run."""
 
-        # Save FAISS index to disk
-        db.save_local(index_file)
-        print(f"✅ Index saved to {index_file}")
+    # Use local embeddings, cached on disk so repeated text is never re-embedded
+    embeddings = CachedEmbeddings(HuggingFaceEmbeddings(model_name=LOCAL_MODEL_PATH), LOCAL_MODEL_PATH)
 
-    return db
+    return load_schema_index(index_file, schemas, embeddings, model_id=LOCAL_MODEL_PATH)
 
 
 # ---------------------------------
 # FAISS Retrieval
 # ---------------------------------
-def retrieve_context(faiss_index, query, k=2):
-    """Retrieve relevant schemas/examples from FAISS."""
-    results = faiss_index.similarity_search(query, k=k)
-    return "\n\n".join([doc.page_content for doc in results])
+def retrieve_contexts(faiss_index, queries, k=2):
+    """Retrieve contexts for many logs with one embedding call and one matrix search."""
+    vectors = np.asarray(faiss_index.embeddings.embed_documents(list(queries)), dtype=np.float32)
+    _, neighbours = faiss_index.index.search(vectors, k)
+
+    contexts = []
+    for row in neighbours:
+        # FAISS pads with -1 when the index holds fewer than k vectors
+        docs = [faiss_index.docstore.search(faiss_index.index_to_docstore_id[i]) for i in row if i != -1]
+        contexts.append("\n\n".join(doc.page_content for doc in docs))
+    return contexts
 
 
 # ---------------------------------
 # Mistral LLM Execution
 # ---------------------------------
-def process_logs_with_rag(logs, faiss_index):
-    """Process logs with RAG (FAISS + Mistral LLM)."""
-    llm = ChatOllama(model=MISTRAL_MODEL, temperature=0.2, timeout=TIMEOUT)
+def map_log_with_rag(log, context, llm):
+    """Map one log with its retrieved context; returns the record, or None when nothing parsed."""
+    prompt = build_rag_prompt(context, log)
+
+    template = PromptTemplate(input_variables=["prompt"], template="{prompt}")
+    chain = template | llm
+
+    try:
+        start_time = time.time()
+        response = chain.invoke({"prompt": prompt})
+        duration = time.time() - start_time
+        get_telemetry().record(response.response_metadata, llm.model, llm.base_url, "rag", duration)
+
+        # Keep the record even when the model added text around it
+        records, _ = salvage_records(response.content)
+        print(f"✅ Processed in {duration:.2f} seconds.")
+        return records[0] if records else None
+    except Exception as e:
+        print(f"❌ Exception: {e}")
+        return None
+
+
+def get_rag_llm():
+    return ChatOllama(model=MISTRAL_MODEL, temperature=0.2, timeout=TIMEOUT, base_url=OLLAMA_HOST)
+
 
-    mapped_results = []
+def process_logs_with_rag(logs, faiss_index, retry_lane=None, llm=None):
+    """Process logs with RAG (FAISS + Mistral LLM), retrying only the logs that failed.
 
-    for log in logs:
-        print(f"🚀 Processing Log: {log}")
+    Retrieval runs per CHUNK_SIZE block of logs; the LLM calls then run
+    concurrently, up to the server's OLLAMA_NUM_PARALLEL slots.
+    """
+    llm = llm or get_rag_llm()
+    retry_lane = retry_lane or RetryLane()
 
-        # Retrieve relevant schema and examples from FAISS
-        context = retrieve_context(faiss_index, log)
+    mapped_results = {}
+    contexts = []
 
-        prompt = f"""
-        Context:
-        {context}
+    with ThreadPoolExecutor(max_workers=OLLAMA_NUM_PARALLEL) as executor:
 
-        Log:
-        {log}
+        def submit(indices):
+            return [(i, executor.submit(map_log_with_rag, logs[i], contexts[i], llm)) for i in indices]
 
-        Task: Map the log to the schema and output as JSON.
-        """
+        def collect(futures):
+            """Store finished records; returns the indices that failed."""
+            failed = []
+            for index, future in futures:
+                result = future.result()
+                if result is None:
+                    failed.append(index)
+                else:
+                    mapped_results[index] = result
+            return failed
 
-        template = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-        chain = template | llm
+        # Each chunk's LLM calls start while the next chunk is being retrieved
+        futures = []
+        for start in range(0, len(logs), CHUNK_SIZE):
+            chunk = logs[start:start + CHUNK_SIZE]
+            print(f"🚀 Retrieving context for {len(chunk)} log(s)")
+            contexts.extend(retrieve_contexts(faiss_index, chunk))
+            futures.extend(submit(range(start, start + len(chunk))))
 
-        try:
-            start_time = time.time()
-            response = chain.invoke({"prompt": prompt})
-            duration = time.time() - start_time
+        failed = collect(futures)
 
-            # Parse JSON response
-            result = json.loads(response.content)
-            mapped_results.append(result)
+        for delay in retry_lane.delays():
+            if not failed:
+                break
+            print(f"🔁 Retrying {len(failed)} log(s) in {delay:.1f}s")
+            time.sleep(delay)
+            failed = collect(submit(failed))
 
-            print(f"✅ Processed in {duration:.2f} seconds.")
-        except Exception as e:
-            print(f"❌ Exception: {e}")
+    for index in failed:
+        print(f"❌ Gave up on log: {logs[index]}")
 
-    return mapped_results
+    return [mapped_results[index] for index in sorted(mapped_results)]
 
 
 # ---------------------------------
@@ -163,6 +161,8 @@ if __name__ == "__main__":
     print(json.dumps(mapped_logs, indent=4))
 
     print(f"\n🚀 Processed {len(logs)} logs in {end - start:.2f} seconds.")
+    print(f"🧮 Embedding Cache: {faiss_index.embeddings.stats()}")
+    print(f"📡 Telemetry: {get_telemetry().summary()}")
 
 """
 🚀 Indexing schemas...
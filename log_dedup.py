@@ -0,0 +1,66 @@
+"""Group lines that differ only in variable values and send one representative per group."""
+
+import copy
+
+from log_templates import TemplateMiner, compile_extractor
+
+
+class LogGroup:
+    """Lines sharing one masked template; the first line stands in for all of them."""
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.members = []
+        self.offsets = []  # Source position of each member
+
+    @property
+    def representative(self):
+        return self.members[0]
+
+    def project(self, record):
+        """Map every member from the representative's record.
+
+        The representative's field positions are compiled into an extractor and
+        replayed on each member's own values. Returns (offset, record) pairs and
+        the (offset, line) pairs that still need the LLM.
+        """
+        representative = self.representative
+        extractor = compile_extractor(representative, record)
+
+        records = [(self.offsets[0], record)]
+        unmatched = []
+        for offset, line in zip(self.offsets[1:], self.members[1:]):
+            if line == representative:
+                records.append((offset, copy.deepcopy(record)))
+                continue
+            projected = extractor.extract(line) if extractor is not None else None
+            if projected is None:
+                unmatched.append((offset, line))
+            else:
+                records.append((offset, projected))
+        return records, unmatched
+
+
+def group_lines(lines, offsets=None, similarity_threshold=None):
+    """Group lines by masked signature, in order of first appearance."""
+    miner = TemplateMiner() if similarity_threshold is None else TemplateMiner(similarity_threshold)
+    groups = {}
+
+    if offsets is None:
+        offsets = range(len(lines))
+
+    for offset, line in zip(offsets, lines):
+        cluster = miner.add_line(line)
+        group = groups.get(id(cluster))
+        if group is None:
+            group = groups[id(cluster)] = LogGroup(cluster)
+        group.members.append(line)
+        group.offsets.append(offset)
+
+    return list(groups.values())
+
+
+def dedup_ratio(groups):
+    """Lines per representative sent to the LLM."""
+    lines = sum(len(group.members) for group in groups)
+    return lines / len(groups) if groups else 0.0
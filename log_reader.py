@@ -0,0 +1,209 @@
+"""Read log files through mmap, follow them as they grow, and checkpoint committed byte offsets.
+
+    python log_reader.py /var/log/servers.log --follow --checkpoint servers.ckpt.json >> records.ndjson
+    python log_reader.py /var/log/servers.log --parquet records.parquet   # A directory of part files
+
+Append (>>) to the output: a restart resumes after the checkpoint, so the
+records written before it must be kept.
+"""
+
+import argparse
+import collections
+import glob
+import json
+import mmap
+import os
+import time
+
+
+POLL_INTERVAL = 1.0  # Seconds between checks of a followed file that has no new data
+CHECKPOINT_PATH = ".log_checkpoint.json"
+
+
+def file_identity(stat):
+    """(device, inode): survives renames, changes when a file is rotated out."""
+    return [stat.st_dev, stat.st_ino]
+
+
+def iter_mmap_lines(file, start, final=False):
+    """Yield (end byte offset, line) for the lines after start, reading through a memory map.
+
+    Only newline-terminated lines are yielded, unless final is set, since the
+    writer may still be appending to the last one.
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size <= start:
+        return
+
+    with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            position = start
+            while position < size:
+                end = mm.find(b"\n", position)
+                if end == -1:
+                    if final:
+                        yield size, str(view[position:size], "utf-8", "replace").rstrip("\r")
+                    return
+                yield end + 1, str(view[position:end], "utf-8", "replace").rstrip("\r")
+                position = end + 1
+        finally:
+            view.release()
+
+
+class Checkpoint:
+    """Committed read positions per log path, written atomically as JSON."""
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def get(self, key):
+        return self.state.get(key)
+
+    def commit(self, key, position):
+        self.state[key] = position
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class LogFollower:
+    """Iterate the lines of a log file from its checkpoint, optionally following it like tail -F.
+
+    While following, a None is yielded each time the reader catches up with
+    the writer, so consumers can flush partial windows. Rotation (the path
+    now names a new file) and truncation are detected on each poll. Call
+    commit(lines) once the first lines read have been fully processed.
+    """
+
+    def __init__(self, path, checkpoint=None, follow=False, poll_interval=POLL_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.checkpoint = checkpoint
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.file = None
+        self.identity = None
+        self.offset = 0
+        self.line = 0  # Lines read so far, across restarts
+        self.pending = collections.deque()  # (line count, identity, end offset) of lines not yet committed
+
+    def _open(self, offset):
+        self.file = open(self.path, "rb")
+        self.identity = file_identity(os.fstat(self.file.fileno()))
+        self.offset = offset
+
+    def _resume(self):
+        """Open the file at its checkpoint, first finishing a rotated-out file if one is found."""
+        position = self.checkpoint.get(self.path) if self.checkpoint else None
+        if position is None:
+            self._open(0)
+            return
+
+        self.line = position["line"]
+        current = file_identity(os.stat(self.path))
+        if current == position["identity"]:
+            self._open(position["offset"])
+            return
+
+        # Rotated while we were down: look for the old file under its rotated name
+        for candidate in sorted(glob.glob(self.path + ".*")):
+            if file_identity(os.stat(candidate)) == position["identity"]:
+                self.file = open(candidate, "rb")
+                self.identity = position["identity"]
+                self.offset = position["offset"]
+                return
+        self._open(0)
+
+    def _read(self, final=False):
+        for end, line in iter_mmap_lines(self.file, self.offset, final):
+            self.offset = end
+            self.line += 1
+            self.pending.append((self.line, self.identity, end))
+            yield line
+
+    def _switch_if_replaced(self, drained):
+        """Move to the new file after rotation or truncation; returns True if anything changed.
+
+        drained says the current file was read to its end after it was
+        rotated out. If not, nothing moves yet: the writer may have appended
+        to it between the last read and the rotation, so the caller must read
+        it once more first.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False  # Between rotation and the new file being created
+
+        if file_identity(stat) != self.identity or self.file.name != self.path:
+            if not drained:
+                return True
+            self.file.close()
+            self._open(0)
+            return True
+        if stat.st_size < self.offset:
+            print(f"⚠️ {self.path} was truncated; reading from the start")
+            self.offset = 0
+            return True
+        return False
+
+    def __iter__(self):
+        self._resume()
+        try:
+            while True:
+                rotated_out = self.file.name != self.path or self._replaced()
+                yield from self._read(final=rotated_out or not self.follow)
+                if not self.follow and not rotated_out:
+                    return
+                if self._switch_if_replaced(drained=rotated_out):
+                    continue
+                yield None
+                time.sleep(self.poll_interval)
+        finally:
+            self.file.close()
+
+    def _replaced(self):
+        try:
+            return file_identity(os.stat(self.path)) != self.identity
+        except FileNotFoundError:
+            return False
+
+    def commit(self, lines):
+        """Checkpoint the position after the first lines read; they must all be processed."""
+        position = None
+        while self.pending and self.pending[0][0] <= lines:
+            position = self.pending.popleft()
+        if position is not None and self.checkpoint is not None:
+            line, identity, offset = position
+            self.checkpoint.commit(self.path, {"identity": identity, "offset": offset, "line": line})
+
+
+def process_file(path, sink, checkpoint_path=CHECKPOINT_PATH, follow=False, **kwargs):
+    """Run batch_process_logs over a file, committing the checkpoint after each finished window."""
+    from langchain_basic import batch_process_logs
+
+    follower = LogFollower(path, Checkpoint(checkpoint_path), follow)
+    position = follower.checkpoint.get(follower.path)
+    first_offset = position["line"] if position else 0
+    batch_process_logs(follower, sink, first_offset=first_offset, on_window=follower.commit, **kwargs)
+
+
+if __name__ == "__main__":
+    from result_sinks import ParquetSink, StdoutSink
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--follow", action="store_true", help="Keep reading as the file grows (tail -F)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--parquet", help="Write typed columns to this Parquet directory (one part file per window) instead of NDJSON to stdout")
+    args = parser.parse_args()
+
+    with (ParquetSink(args.parquet) if args.parquet else StdoutSink()) as output:
+        process_file(args.path, output, args.checkpoint, args.follow)
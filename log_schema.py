@@ -0,0 +1,122 @@
+"""Target schema for mapped server logs, as JSON Schema, with a small record validator."""
+
+import re
+
+
+STATES = ["Running", "Idle", "Down", "Overload"]
+ALERT_LEVELS = ["None", "Low", "Medium", "High", "Critical"]
+
+SERVER_LOG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "timestamp": {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}"},
+        "server": {
+            "type": "object",
+            "properties": {
+                "cpu": {"type": "string", "pattern": r"\S"},
+                "memory": {"type": "string", "pattern": r"^\d+(\.\d+)?\s*[KMGT]B\b"},
+                "disk": {"type": "string", "pattern": r"^\d+(\.\d+)?\s*[KMGT]B\b"},
+            },
+            "required": ["cpu", "memory", "disk"],
+        },
+        "status": {
+            "type": "object",
+            "properties": {
+                "state": {"type": "string", "enum": STATES},
+                "temperature": {"type": "string", "pattern": r"^-?\d+(\.\d+)?\s*°C$"},
+                "alert_level": {"type": "string", "enum": ALERT_LEVELS},
+            },
+            "required": ["state", "temperature", "alert_level"],
+        },
+    },
+    "required": ["timestamp", "server", "status"],
+}
+
+TYPES = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": int, "boolean": bool}
+
+
+def validate(value, schema, path="$"):
+    """Return a list of errors for value against the JSON Schema subset used here."""
+    errors = []
+
+    expected = schema.get("type")
+    if expected and not isinstance(value, TYPES[expected]):
+        return [f"{path}: expected {expected}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+
+    if "pattern" in schema and isinstance(value, str) and not re.search(schema["pattern"], value):
+        errors.append(f"{path}: {value!r} does not match {schema['pattern']}")
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: missing")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], subschema, f"{path}.{key}"))
+
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def validate_record(record, schema=SERVER_LOG_SCHEMA):
+    """Errors for one mapped log record; empty when it can be accepted."""
+    return validate(record, schema)
+
+
+YAML_TYPES = {"string": "string", "str": "string", "number": "number", "float": "number",
+              "integer": "integer", "int": "integer", "boolean": "boolean", "bool": "boolean"}
+
+
+def yaml_to_json_schema(text):
+    """Compile the nested `key: type` YAML schemas used in the prompts into JSON Schema."""
+    root = {"type": "object", "properties": {}, "required": []}
+    stack = [(-1, root)]
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        indent = len(raw) - len(raw.lstrip())
+        key, _, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+
+        while indent <= stack[-1][0]:
+            stack.pop()
+        parent = stack[-1][1]
+
+        if value:
+            node = {"type": YAML_TYPES.get(value, "string")}
+        else:
+            node = {"type": "object", "properties": {}, "required": []}
+            stack.append((indent, node))
+
+        parent["properties"][key] = node
+        parent["required"].append(key)
+
+    return root
+
+
+def array_schema(item_schema):
+    """Schema for a JSON array of records, the shape batch prompts ask for."""
+    return {"type": "array", "items": item_schema}
+
+
+def format_schema(schema):
+    """Copy of schema for Ollama's `format` constraint.
+
+    Regex patterns are left to validate_record: the server's grammar
+    conversion only partly supports them, and a bad one fails the request.
+    """
+    if isinstance(schema, dict):
+        return {key: format_schema(value) for key, value in schema.items()
+                if not (key == "pattern" and isinstance(value, str))}
+    if isinstance(schema, list):
+        return [format_schema(value) for value in schema]
+    return schema
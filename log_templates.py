@@ -0,0 +1,225 @@
+"""Drain-style template mining so already-seen log line shapes skip the LLM."""
+
+import re
+
+
+SIMILARITY_THRESHOLD = 0.5  # Share of equal tokens needed to join a cluster
+MAX_EXTRACTORS_PER_CLUSTER = 4
+WILDCARD = "<*>"
+
+# Variable parts masked before clustering, most specific first
+MASKS = [
+    ("<TS>", r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    ("<IP>", r"\b\d{1,3}(?:\.\d{1,3}){3}\b"),
+    ("<HEX>", r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,}\b"),
+    ("<NUM>", r"\b\d+(?:\.\d+)?\b"),
+]
+
+MASK_PATTERNS = [(token, re.compile(pattern)) for token, pattern in MASKS]
+ANY_MASK = re.compile("|".join(f"(?:{pattern})" for _, pattern in MASKS))
+
+
+def mask_line(line):
+    """Replace timestamps, IPs, hex IDs and numbers with placeholder tokens."""
+    for token, pattern in MASK_PATTERNS:
+        line = pattern.sub(token, line)
+    return line
+
+
+def _literal_pattern(text):
+    """Escape literal text, keeping masked variable parts generic."""
+    parts = []
+    last = 0
+    for match in ANY_MASK.finditer(text):
+        parts.append(re.escape(text[last:match.start()]))
+        parts.append(f"(?:{ANY_MASK.pattern})")
+        last = match.end()
+    parts.append(re.escape(text[last:]))
+    return "".join(parts)
+
+
+def _iter_leaves(record, path=()):
+    """Yield (path, value) for every scalar in a nested record."""
+    if isinstance(record, dict):
+        for key, value in record.items():
+            yield from _iter_leaves(value, path + (key,))
+    else:
+        yield path, record
+
+
+def _set_path(record, path, value):
+    """Set a value in a nested dict, creating intermediate dicts."""
+    for key in path[:-1]:
+        record = record.setdefault(key, {})
+    record[path[-1]] = value
+
+
+class TemplateExtractor:
+    """Compiled regex plus field mapping that rebuilds a record from a matching line."""
+
+    def __init__(self, pattern, leaves):
+        self.pattern = pattern
+        # Each leaf is (path, group_index, cast) or (path, None, constant)
+        self.leaves = leaves
+
+    def extract(self, line):
+        """Return the mapped record, or None if the line does not fit the template."""
+        match = self.pattern.fullmatch(line.strip())
+        if not match:
+            return None
+
+        record = {}
+        for path, group, value in self.leaves:
+            if group is None:
+                _set_path(record, path, value)
+            else:
+                _set_path(record, path, value(match.group(group)))
+        return record
+
+
+def compile_extractor(line, record):
+    """Turn one LLM mapping of a line into a reusable extractor, or None if it cannot be replayed."""
+    if not isinstance(record, dict):
+        return None
+
+    text = line.strip()
+    leaves = list(_iter_leaves(record))
+    taken = []  # (start, end, leaf_index)
+
+    # Place longer values first so short ones ("None", "High") do not steal their spans
+    order = sorted(range(len(leaves)), key=lambda i: -len(str(leaves[i][1])))
+    for i in order:
+        value = leaves[i][1]
+        if value is None or value == "" or isinstance(value, (bool, list)):
+            continue
+
+        needle = str(value)
+        start = text.find(needle)
+        while start != -1 and any(s < start + len(needle) and start < e for s, e, _ in taken):
+            start = text.find(needle, start + 1)
+        if start == -1:
+            return None
+        taken.append((start, start + len(needle), i))
+
+    taken.sort()
+    parts = []
+    groups = {}
+    last = 0
+    for group, (start, end, i) in enumerate(taken, start=1):
+        parts.append(_literal_pattern(text[last:start]))
+        parts.append("(.+?)")
+        groups[i] = group
+        last = end
+    parts.append(_literal_pattern(text[last:]))
+
+    compiled = []
+    for i, (path, value) in enumerate(leaves):
+        if i in groups:
+            cast = type(value) if isinstance(value, (int, float)) else str
+            compiled.append((path, groups[i], cast))
+        else:
+            compiled.append((path, None, value))
+
+    extractor = TemplateExtractor(re.compile("".join(parts), re.DOTALL), compiled)
+
+    # Only keep extractors that reproduce the LLM's own answer
+    if extractor.extract(text) != record:
+        return None
+    return extractor
+
+
+class LogCluster:
+    """One mined template and the extractors learned for it."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.size = 1
+        self.extractors = []
+
+    @property
+    def template(self):
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens):
+        """Share of positions where the template and the tokens agree."""
+        equal = sum(1 for a, b in zip(self.tokens, tokens) if a == b or a == WILDCARD)
+        return equal / len(tokens)
+
+    def merge(self, tokens):
+        """Widen the template with wildcards where the tokens differ."""
+        self.tokens = [a if a == b else WILDCARD for a, b in zip(self.tokens, tokens)]
+        self.size += 1
+
+
+class TemplateMiner:
+    """Cluster log lines by masked shape and extract known shapes without the LLM."""
+
+    def __init__(self, similarity_threshold=SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+        self.buckets = {}  # (token count, first token) -> [LogCluster]
+        self.hits = 0
+        self.misses = 0
+
+    def _tokens(self, line):
+        return mask_line(line.strip()).split()
+
+    def _find(self, tokens):
+        bucket = self.buckets.get((len(tokens), tokens[0] if tokens else ""), [])
+        best, best_score = None, 0.0
+        for cluster in bucket:
+            score = cluster.similarity(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score >= self.similarity_threshold:
+            return best
+        return None
+
+    def add_line(self, line):
+        """Assign a line to its cluster, creating one for a new template."""
+        tokens = self._tokens(line)
+        cluster = self._find(tokens)
+        if cluster is None:
+            cluster = LogCluster(tokens)
+            self.buckets.setdefault((len(tokens), tokens[0] if tokens else ""), []).append(cluster)
+        else:
+            cluster.merge(tokens)
+        return cluster
+
+    def extract(self, line):
+        """Return a locally extracted record, or None if the line needs the LLM."""
+        cluster = self._find(self._tokens(line))
+        if cluster is not None:
+            for extractor in cluster.extractors:
+                record = extractor.extract(line)
+                if record is not None:
+                    self.hits += 1
+                    cluster.size += 1
+                    return record
+        self.misses += 1
+        return None
+
+    def learn(self, line, record):
+        """Compile the LLM's mapping of a line into an extractor for its template."""
+        cluster = self.add_line(line)
+        if len(cluster.extractors) >= MAX_EXTRACTORS_PER_CLUSTER:
+            return False
+
+        extractor = compile_extractor(line, record)
+        if extractor is None:
+            return False
+        cluster.extractors.append(extractor)
+        return True
+
+    @property
+    def clusters(self):
+        return [cluster for bucket in self.buckets.values() for cluster in bucket]
+
+    def stats(self):
+        """Template count and local hit rate."""
+        total = self.hits + self.misses
+        return {
+            "templates": len(self.clusters),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,161 @@
+"""Merge lines from many concurrent callers into token-budgeted micro-batches."""
+
+import asyncio
+import itertools
+import time
+
+from async_batch import OLLAMA_NUM_PARALLEL, AsyncBatchEngine
+from token_batcher import DEFAULT_BUDGET, OUTPUT_TOKENS_PER_LINE, TokenBatch
+from tokenizer import count_tokens_batch
+
+
+MAX_WAIT = 0.05  # Seconds a batch stays open for more lines after its first one arrives
+
+STOP = object()
+
+
+class MicroBatcher:
+    """Queue lines from any number of submit() calls and dispatch them as shared batches.
+
+    A batch closes when the token budget is full or max_wait has passed since
+    its first line. While every slot is busy, lines keep queueing, so batches
+    grow under load and stay small and fast when idle. worker is an async
+    function (batch) -> (offset, line, record) triples, like amap_chunk. Pass
+    an AIMDLimiter as limiter to let the number of slots adapt to latency.
+    """
+
+    def __init__(self, worker, overhead_tokens=0, budget=DEFAULT_BUDGET, max_wait=MAX_WAIT,
+                 max_in_flight=OLLAMA_NUM_PARALLEL, output_per_line=OUTPUT_TOKENS_PER_LINE, limiter=None):
+        self.worker = worker
+        self.overhead_tokens = overhead_tokens
+        self.budget = budget
+        self.max_wait = max_wait
+        self.output_per_line = output_per_line
+        self.engine = AsyncBatchEngine(self._run, max_in_flight, limiter)
+        self.queue = asyncio.Queue()
+        self.futures = {}
+        self.ids = itertools.count()
+        self.task = None
+
+        self.batches = 0
+        self.lines = 0
+        self.fill = 0.0
+        self.wait_seconds = 0.0
+
+    def start(self):
+        self.task = asyncio.create_task(self._dispatch())
+        return self
+
+    async def stop(self):
+        """Finish the queued lines, then stop dispatching."""
+        await self.queue.put(STOP)
+        await self.task
+
+    async def submit(self, lines):
+        """Map lines; returns one record per line, None where no record was produced."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        line_ids = []
+        try:
+            for line, tokens in zip(lines, count_tokens_batch(lines)):
+                future = loop.create_future()
+                line_id = next(self.ids)
+                self.futures[line_id] = future
+                futures.append(future)
+                line_ids.append(line_id)
+                # +1 for the newline joining the line into the prompt
+                await self.queue.put((line_id, line, tokens + 1, time.perf_counter()))
+            return await asyncio.gather(*futures)
+        finally:
+            # A caller that went away (cancelled) leaves no futures behind
+            for line_id in line_ids:
+                self.futures.pop(line_id, None)
+
+    def _fits(self, batch, tokens):
+        return (
+            batch.prompt_tokens + tokens <= self.budget.prompt_tokens
+            and batch.output_tokens + self.output_per_line <= self.budget.output_tokens
+        )
+
+    def _add(self, batch, item):
+        line_id, line, tokens, queued = item
+        batch.append(line)
+        batch.offsets.append(line_id)
+        batch.prompt_tokens += tokens
+        batch.output_tokens += self.output_per_line
+        batch.queued.append(queued)
+
+    async def _assemble(self):
+        """Yield TokenBatches from the queue; the engine pulls one only when a slot is free."""
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            item = carry if carry is not None else await self.queue.get()
+            carry = None
+            if item is STOP:
+                return
+
+            batch = TokenBatch(self.overhead_tokens)
+            batch.queued = []  # Submit time of each line
+            self._add(batch, item)
+            deadline = loop.time() + self.max_wait
+
+            while True:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    if self.engine.in_flight < self.engine.max_in_flight:
+                        break
+                    # Every slot is busy, so keep filling until one frees up
+                    timeout = self.max_wait
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    continue
+                if item is STOP or not self._fits(batch, item[2]):
+                    carry = item
+                    break
+                self._add(batch, item)
+
+            self.batches += 1
+            self.lines += len(batch)
+            self.fill += batch.prompt_tokens / self.budget.prompt_tokens
+            yield batch
+
+    async def _run(self, batch):
+        """Call the worker and resolve the batch's futures as soon as it returns.
+
+        The engine only yields a result when it pulls the next batch, which may
+        not come for a while once callers go quiet, so results are not waited for there.
+        """
+        futures = [self.futures.pop(line_id, None) for line_id in batch.offsets]
+        now = time.perf_counter()
+        self.wait_seconds += sum(now - queued for queued in batch.queued)
+        try:
+            mapped = await self.worker(batch)
+        except Exception as e:
+            print(f"❌ Failed to process batch: {e}")
+            for future in futures:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        records = {offset: record for offset, _, record in mapped if offset is not None}
+        for line_id, future in zip(batch.offsets, futures):
+            # Futures of callers that disconnected are already cancelled
+            if future is not None and not future.done():
+                future.set_result(records.get(line_id))
+
+    async def _dispatch(self):
+        async for _ in self.engine.run(self._assemble()):
+            pass
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "in_flight": self.engine.in_flight,
+            "batches": self.batches,
+            "lines": self.lines,
+            "avg_batch_lines": self.lines / self.batches if self.batches else 0.0,
+            "avg_batch_fill": self.fill / self.batches if self.batches else 0.0,
+            "avg_queue_wait": self.wait_seconds / self.lines if self.lines else 0.0,
+        }
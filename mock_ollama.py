@@ -0,0 +1,293 @@
+"""Local stand-in for an Ollama server, for benchmarks that need no GPU or model.
+
+Implements /api/generate, /api/chat and /v1/chat/completions (plus /api/tags
+and /api/version for health checks) with configurable latency, token rate,
+stream chunking and failure injection. Answers are built from the log lines in
+the prompt, so the pipelines' JSON parsing runs on realistic output.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CHARS_PER_TOKEN = 4
+
+TIMESTAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})\]?\s*")
+KEY_VALUE = re.compile(r"([A-Za-z][\w ]*?)\s*[:=]\s*(.+?)(?=,\s|\.\s|\.?$)", re.MULTILINE)
+
+SCHEMA_KEYS = {
+    "cpu": ("server", "cpu"),
+    "memory": ("server", "memory"),
+    "disk": ("server", "disk"),
+    "status": ("status", "state"),
+    "temperature": ("status", "temperature"),
+    "alert": ("status", "alert_level"),
+}
+
+
+def count_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def map_log_line(timestamp, text):
+    """Map one server log line to the nested schema used by the pipelines."""
+    record = {"timestamp": timestamp, "server": {}, "status": {}}
+    for key, value in KEY_VALUE.findall(text):
+        for name, (section, field) in SCHEMA_KEYS.items():
+            if name in key.lower():
+                record[section][field] = value.strip()
+                break
+    return record
+
+
+def mock_answer(prompt):
+    """JSON array of records for timestamped log lines, else a flat key/value object."""
+    records = []
+    for line in prompt.splitlines():
+        match = TIMESTAMP.match(line.strip())
+        if match:
+            records.append(map_log_line(match.group(1), line.strip()[match.end():]))
+
+    if records:
+        return json.dumps(records, ensure_ascii=False)
+    return json.dumps({key.strip(): value.strip() for key, value in KEY_VALUE.findall(prompt)}, ensure_ascii=False)
+
+
+def prompt_of(path, payload):
+    if path == "/api/generate":
+        return payload.get("prompt", "")
+    messages = payload.get("messages") or [{}]
+    return messages[-1].get("content", "")
+
+
+class MockConfig:
+    """Server behaviour; every field can be changed while the server runs."""
+
+    def __init__(self, latency=0.05, token_rate=200.0, chunk_bytes=0, failure_rate=0.0,
+                 models=("mistral", "phi"), seed=None):
+        self.latency = latency  # Seconds before the first token (prompt evaluation)
+        self.token_rate = token_rate  # Generated tokens per second
+        self.chunk_bytes = chunk_bytes  # Split streamed bytes into writes of this size; 0 = one per fragment
+        self.failure_rate = failure_rate  # Share of requests answered with HTTP 500
+        self.models = list(models)
+        self.random = random.Random(seed)
+
+
+class MockStats:
+    """Server-side request counts and service times."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.service_times = []
+
+    def record(self, seconds, failed=False):
+        with self.lock:
+            self.requests += 1
+            self.failures += failed
+            self.service_times.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "service_seconds": sum(self.service_times),
+            }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client pooling is exercised
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        size = self.config.chunk_bytes or len(data)
+        for i in range(0, len(data), size):
+            piece = data[i:i + size]
+            self.wfile.write(f"{len(piece):x}\r\n".encode("ascii") + piece + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json(200, {"version": "mock"})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in self.config.models]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path not in ("/api/generate", "/api/chat", "/v1/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        config = self.config
+        time.sleep(config.latency)
+
+        if config.random.random() < config.failure_rate:
+            self._send_json(500, {"error": "injected failure"})
+            self.server.stats.record(time.perf_counter() - start, failed=True)
+            return
+
+        prompt = prompt_of(self.path, payload)
+        answer = mock_answer(prompt)
+        model = payload.get("model", "mistral")
+        default_stream = self.path != "/v1/chat/completions"
+
+        if payload.get("stream", default_stream):
+            self._stream(model, prompt, answer, start)
+        else:
+            time.sleep(count_tokens(answer) / config.token_rate)
+            self._send_json(200, self._final(model, prompt, answer, start))
+
+        self.server.stats.record(time.perf_counter() - start)
+
+    def _timings(self, prompt, answer, start):
+        eval_count = count_tokens(answer)
+        total = time.perf_counter() - start
+        return {
+            "total_duration": int(total * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": count_tokens(prompt),
+            "prompt_eval_duration": int(self.config.latency * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_count / self.config.token_rate * 1e9),
+        }
+
+    def _final(self, model, prompt, answer, start):
+        timings = self._timings(prompt, answer, start)
+        if self.path == "/v1/chat/completions":
+            return {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": timings["prompt_eval_count"],
+                          "completion_tokens": timings["eval_count"],
+                          "total_tokens": timings["prompt_eval_count"] + timings["eval_count"]},
+            }
+        body = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": True,
+                "done_reason": "stop", **timings}
+        if self.path == "/api/chat":
+            body["message"] = {"role": "assistant", "content": answer}
+        else:
+            body["response"] = answer
+        return body
+
+    def _fragment(self, model, piece):
+        if self.path == "/v1/chat/completions":
+            body = {"object": "chat.completion.chunk", "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}}]}
+            return b"data: " + json.dumps(body).encode("utf-8") + b"\n\n"
+        body = {"model": model, "done": False}
+        if self.path == "/api/chat":
+            body["message"] = {"role": "assistant", "content": piece}
+        else:
+            body["response"] = piece
+        return json.dumps(body).encode("utf-8") + b"\n"
+
+    def _stream(self, model, prompt, answer, start):
+        self.send_response(200)
+        content_type = "text/event-stream" if self.path == "/v1/chat/completions" else "application/x-ndjson"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        first = time.perf_counter()
+        for i in range(0, len(answer), CHARS_PER_TOKEN):
+            # Pace against the clock rather than sleeping a fixed amount per token
+            delay = first + (i // CHARS_PER_TOKEN) / self.config.token_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._write_chunk(self._fragment(model, answer[i:i + CHARS_PER_TOKEN]))
+
+        if self.path == "/v1/chat/completions":
+            self._write_chunk(b"data: [DONE]\n\n")
+        else:
+            final = self._final(model, prompt, "", start)
+            final.update(self._timings(prompt, answer, start))
+            self._write_chunk(json.dumps(final).encode("utf-8") + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class MockOllamaServer:
+    """Run the stand-in server on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = MockConfig(**config)
+        self.httpd.stats = MockStats()
+        self.thread = None
+
+    @property
+    def config(self):
+        return self.httpd.config
+
+    @property
+    def stats(self):
+        return self.httpd.stats
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--chunk-bytes", type=int, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockOllamaServer(args.host, args.port, latency=args.latency, token_rate=args.token_rate,
+                              chunk_bytes=args.chunk_bytes, failure_rate=args.failure_rate)
+    print(f"🧪 Mock Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
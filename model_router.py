@@ -0,0 +1,112 @@
+"""Model cascade: try the small model first and escalate only the records that fail validation."""
+
+import threading
+import time
+
+from log_schema import validate_record
+
+
+MIN_SAMPLES = 20  # Lines a model must have seen before its place in the cascade is tuned
+
+
+class ModelStats:
+    """Acceptance rate and latency of one model in the cascade."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lines = 0
+        self.accepted = 0
+        self.seconds = 0.0
+
+    @property
+    def acceptance(self):
+        return self.accepted / self.lines if self.lines else 0.0
+
+    @property
+    def cost_per_accepted(self):
+        """Seconds spent per line this model got right; infinite if none yet."""
+        if not self.accepted:
+            return float("inf")
+        return self.seconds / self.accepted
+
+    def summary(self):
+        return {
+            "calls": self.calls,
+            "lines": self.lines,
+            "acceptance": round(self.acceptance, 3),
+            "avg_latency": round(self.seconds / self.calls, 3) if self.calls else None,
+        }
+
+
+class CascadeRouter:
+    """Send each batch to the models in order, re-sending only lines whose records fail validation.
+
+    call is an async function (model, lines) -> (index, record) pairs, where
+    index is the line's position in lines, or None when a record could not be
+    lined up with its input. The last model's output is kept even if invalid.
+    """
+
+    def __init__(self, models, call, validate=validate_record, min_samples=MIN_SAMPLES, auto_tune=True):
+        self.models = list(models)
+        self.call = call
+        self.validate = validate
+        self.min_samples = min_samples
+        self.auto_tune = auto_tune
+        self.stats = {model: ModelStats() for model in self.models}
+        self._lock = threading.Lock()
+
+    async def map_lines(self, lines):
+        """Map lines through the cascade; returns (index, record) pairs like call."""
+        results = []
+        remaining = list(range(len(lines)))
+        models = list(self.models)
+
+        for position, model in enumerate(models):
+            last = position == len(models) - 1
+
+            start = time.perf_counter()
+            pairs = await self.call(model, [lines[i] for i in remaining])
+            duration = time.perf_counter() - start
+
+            accepted = 0
+            failed = []
+            placed = set()
+            for index, record in pairs:
+                if index is None:
+                    if last:
+                        results.append((None, record))
+                    continue
+                placed.add(index)
+                if not self.validate(record):
+                    accepted += 1
+                    results.append((remaining[index], record))
+                elif last:
+                    results.append((remaining[index], record))
+                else:
+                    failed.append(remaining[index])
+
+            # Lines the model produced nothing usable for also escalate
+            failed.extend(remaining[i] for i in range(len(remaining)) if i not in placed)
+            self._record(model, len(remaining), accepted, duration)
+
+            remaining = sorted(failed)
+            if not remaining or last:
+                break
+            print(f"⤴️ {len(remaining)} record(s) escalated from {model}")
+
+        return results
+
+    def _record(self, model, lines, accepted, duration):
+        with self._lock:
+            stats = self.stats[model]
+            stats.calls += 1
+            stats.lines += lines
+            stats.accepted += accepted
+            stats.seconds += duration
+
+            if self.auto_tune and all(s.lines >= self.min_samples for s in self.stats.values()):
+                self.models.sort(key=lambda name: self.stats[name].cost_per_accepted)
+
+    def summary(self):
+        with self._lock:
+            return {"order": list(self.models), **{model: s.summary() for model, s in self.stats.items()}}
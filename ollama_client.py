@@ -0,0 +1,152 @@
+"""Pooled, keep-alive HTTP client shared by every script that talks to Ollama."""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import get_telemetry
+
+
+DEFAULT_PORT = 11434
+POOL_SIZE = 8  # Max open connections to the server
+
+GENERATE = "/api/generate"
+CHAT = "/api/chat"
+CHAT_COMPLETIONS = "/v1/chat/completions"
+
+# (connect, read) timeouts in seconds per endpoint
+DEFAULT_TIMEOUTS = {
+    GENERATE: (3.05, 120),
+    CHAT: (3.05, 120),
+    CHAT_COMPLETIONS: (3.05, 120),
+}
+
+
+def normalize_host(host):
+    """Base URL for an OLLAMA_HOST value; like Ollama itself, accepts "0.0.0.0:11434" or a bare host."""
+    host = host.strip().rstrip("/")
+    if "://" in host:
+        return host
+    if not re.search(r":\d+$", host):
+        host = f"{host}:{DEFAULT_PORT}"
+    return "http://" + host
+
+
+OLLAMA_HOST = normalize_host(os.environ.get("OLLAMA_HOST", "http://localhost:11434"))
+
+
+class OllamaClient:
+    """One requests.Session with a bounded connection pool and per-endpoint timeouts."""
+
+    def __init__(self, base_url=OLLAMA_HOST, pool_size=POOL_SIZE, timeouts=None):
+        self.base_url = normalize_host(base_url)
+        self.pool_size = pool_size
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        # Callers wait here instead of inside urllib3 so the wait can be measured
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._queue_wait = 0.0
+        self._max_queue_wait = 0.0
+
+    def _acquire(self):
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._requests += 1
+            self._queue_wait += waited
+            self._max_queue_wait = max(self._max_queue_wait, waited)
+
+    def _post(self, path, payload, stream):
+        return self.session.post(
+            self.base_url + path,
+            json=payload,
+            stream=stream,
+            timeout=self.timeouts.get(path, DEFAULT_TIMEOUTS[GENERATE]),
+        )
+
+    def post(self, path, payload):
+        """Send a non-streaming request and return the fully read response; its timings go to telemetry."""
+        self._acquire()
+        try:
+            response = self._post(path, payload, stream=False)
+        finally:
+            self._slots.release()
+        get_telemetry().record_response(response)
+        return response
+
+    @contextmanager
+    def stream(self, path, payload):
+        """Send a streaming request; the pool slot is held until the block exits."""
+        self._acquire()
+        try:
+            with self._post(path, payload, stream=True) as response:
+                yield response
+        finally:
+            self._slots.release()
+
+    def generate(self, payload):
+        return self.post(GENERATE, dict(payload, stream=False))
+
+    def chat(self, payload):
+        return self.post(CHAT, dict(payload, stream=False))
+
+    def chat_completions(self, payload):
+        return self.post(CHAT_COMPLETIONS, payload)
+
+    def stats(self):
+        """Connections opened/reused and time spent waiting for a free pool slot."""
+        opened = 0
+        served = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+
+        with self._lock:
+            requests_sent = self._requests
+            queue_wait = self._queue_wait
+            max_queue_wait = self._max_queue_wait
+
+        return {
+            "requests": requests_sent,
+            "connections_opened": opened,
+            "connections_reused": max(0, served - opened),
+            "queue_wait_total": queue_wait,
+            "queue_wait_avg": queue_wait / requests_sent if requests_sent else 0.0,
+            "queue_wait_max": max_queue_wait,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client; an EndpointPool when OLLAMA_ENDPOINTS lists several servers."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if os.environ.get("OLLAMA_ENDPOINTS"):
+                from endpoint_pool import get_pool
+                _client = get_pool()
+            else:
+                _client = OllamaClient()
+        return _client
@@ -0,0 +1,139 @@
+"""Incremental NDJSON framing for Ollama's streaming endpoints."""
+
+import json
+import time
+
+from telemetry import endpoint_of, get_telemetry
+
+
+CHUNK_SIZE = 1024  # Bytes read from the socket per iteration
+NEWLINE = 0x0A
+
+
+class NDJSONDecoder:
+    """Split a byte stream into complete JSON fragments, keeping partial lines between reads."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.errors = 0
+
+    def _decode(self, view):
+        try:
+            return json.loads(str(view, "utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.errors += 1
+            return None
+
+    def feed(self, chunk):
+        """Return every fragment completed by this chunk."""
+        buffer = self._buffer
+        start = len(buffer)
+        buffer += chunk
+
+        # Only the new bytes can hold a newline; older ones were scanned already
+        end = buffer.find(NEWLINE, start)
+        if end == -1:
+            return []
+
+        fragments = []
+        start = 0
+        with memoryview(buffer) as view:
+            while end != -1:
+                if end > start:
+                    fragment = self._decode(view[start:end])
+                    if fragment is not None:
+                        fragments.append(fragment)
+                start = end + 1
+                end = buffer.find(NEWLINE, start)
+
+        # Reuse the same bytearray for the trailing partial line
+        del buffer[:start]
+        return fragments
+
+    def close(self):
+        """Decode whatever is left once the stream ends without a final newline."""
+        fragments = []
+        if self._buffer.strip():
+            with memoryview(self._buffer) as view:
+                fragment = self._decode(view)
+            if fragment is not None:
+                fragments.append(fragment)
+        self._buffer.clear()
+        return fragments
+
+
+def fragment_text(fragment):
+    """Generated text carried by a /api/generate or /api/chat fragment."""
+    if "response" in fragment:
+        return fragment["response"]
+    return fragment.get("message", {}).get("content", "")
+
+
+class StreamStats:
+    """Time-to-first-token and decode rate for one streamed call."""
+
+    def __init__(self, start_time=None):
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self.first_token_time = None
+        self.end_time = None
+        self.fragments = 0
+        self.final = {}
+
+    def observe(self, fragment):
+        self.fragments += 1
+        if self.first_token_time is None and fragment_text(fragment):
+            self.first_token_time = time.perf_counter()
+        if fragment.get("done"):
+            self.end_time = time.perf_counter()
+            self.final = fragment
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_time is None:
+            return None
+        return self.first_token_time - self.start_time
+
+    @property
+    def tokens_per_second(self):
+        """Server-side decode rate from the final eval_count / eval_duration frame."""
+        eval_count = self.final.get("eval_count")
+        eval_duration = self.final.get("eval_duration")
+        if not eval_count or not eval_duration:
+            return None
+        return eval_count / (eval_duration / 1e9)
+
+    def summary(self):
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "tokens_per_second": self.tokens_per_second,
+            "eval_count": self.final.get("eval_count"),
+            "fragments": self.fragments,
+        }
+
+
+def iter_stream(response, stats=None, chunk_size=CHUNK_SIZE):
+    """Yield decoded fragments from a streaming requests response; the final one's timings go to telemetry."""
+    decoder = NDJSONDecoder()
+    start_time = time.perf_counter()
+
+    def observe(fragment):
+        if stats is not None:
+            stats.observe(fragment)
+        if fragment.get("done"):
+            # elapsed covers the wait for headers, before iteration started
+            wall_seconds = response.elapsed.total_seconds() + time.perf_counter() - start_time
+            get_telemetry().record(fragment, endpoint=endpoint_of(response.url), wall_seconds=wall_seconds)
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        for fragment in decoder.feed(chunk):
+            observe(fragment)
+            yield fragment
+
+    for fragment in decoder.close():
+        observe(fragment)
+        yield fragment
+
+    if decoder.errors:
+        print(f"⚠️ Skipped {decoder.errors} malformed stream fragment(s)")
@@ -1,7 +1,8 @@
-import requests
 import json
 import time
 from io import StringIO
+from ollama_client import GENERATE, get_client
+from ollama_stream import StreamStats, fragment_text, iter_stream
 
 
 def extract_attributes(log_text, model_name="phi", temperature=0.1, max_tokens=1024):
@@ -20,39 +21,29 @@ def extract_attributes(log_text, model_name="phi", temperature=0.1, max_tokens=1
         "model": model_name,
         "prompt": prompt,
         "temperature": temperature,
-        "max_tokens": max_tokens
+        "max_tokens": max_tokens,
+        "format": "json"  # Constrained decoding: the output is always a JSON object
     }
 
-    with requests.post("http://localhost:11434/api/generate", json=payload, stream=True) as response:
+    stats = StreamStats()
+
+    with get_client().stream(GENERATE, payload) as response:
         if response.status_code != 200:
             print(f"Error: {response.status_code}")
             return None, 0.0
 
         buffer = StringIO()
 
-        for chunk in response.iter_content(chunk_size=1024):
-            if chunk:
-                try:
-                    chunk_json = json.loads(chunk)
-                    buffer.write(chunk_json.get("response", ""))
-                except json.JSONDecodeError:
-                    continue
+        for fragment in iter_stream(response, stats):
+            buffer.write(fragment_text(fragment))
 
         elapsed_time = time.time() - start_time
+        print(f"⚡ {model_name} stream: {stats.summary()}")
 
         full_response = buffer.getvalue().strip()
 
         try:
-            # Locate the first and last valid JSON objects in case of extra content
-            start_idx = full_response.find("{")
-            end_idx = full_response.rfind("}") + 1
-
-            if start_idx != -1 and end_idx != -1:
-                valid_json = full_response[start_idx:end_idx]
-                result = json.loads(valid_json)
-            else:
-                result = {"error": "Invalid JSON format"}
-
+            result = json.loads(full_response)
         except json.JSONDecodeError:
             result = {"error": "Failed to parse JSON"}
 
@@ -69,13 +60,14 @@ Disk: 512GB SSD
 Temperature: 45°C
 """
 
-# Extract attributes
-output, processing_time = extract_attributes(log_data)
+if __name__ == "__main__":
+    # Extract attributes
+    output, processing_time = extract_attributes(log_data)
 
-# Display results
-if output:
-    print(json.dumps(output, indent=4))  # Clean JSON output
-print(f"\n️ {processing_time:.2f} seconds")
+    # Display results
+    if output:
+        print(json.dumps(output, indent=4))  # Clean JSON output
+    print(f"\n️ {processing_time:.2f} seconds")
 
 
 """
@@ -1,7 +1,8 @@
-import requests
 import json
 import time
 from io import StringIO
+from ollama_client import GENERATE, get_client
+from ollama_stream import StreamStats, fragment_text, iter_stream
 
 
 def extract_attributes_with_model(log_text, model_name="mistral"):
@@ -18,26 +19,25 @@ def extract_attributes_with_model(log_text, model_name="mistral"):
         "model": model_name,
         "prompt": prompt,
         "temperature": 0.1,
-        "max_tokens": 1024
+        "max_tokens": 1024,
+        "format": "json"  # Constrained decoding: the output is always a JSON object
     }
 
-    with requests.post("http://localhost:11434/api/generate", json=payload, stream=True) as response:
+    stats = StreamStats()
+
+    with get_client().stream(GENERATE, payload) as response:
         if response.status_code != 200:
             print(f"❌ Error with {model_name}: {response.status_code}")
             return None, 0.0
 
         buffer = StringIO()
 
-        for chunk in response.iter_content(chunk_size=1024):
-            if chunk:
-                try:
-                    chunk_json = json.loads(chunk)
-                    buffer.write(chunk_json.get("response", ""))
-                except json.JSONDecodeError:
-                    print(f"⚠️ Skipping invalid chunk for {model_name}")
+        for fragment in iter_stream(response, stats):
+            buffer.write(fragment_text(fragment))
 
         end_time = time.time()
         elapsed_time = end_time - start_time
+        print(f"⚡ {model_name} stream: {stats.summary()}")
 
         full_response = buffer.getvalue()
 
@@ -60,27 +60,30 @@ Disk: 512GB SSD
 Temperature: 45°C
 """
 
-# Run with both models
-mistral_output, mistral_time = extract_attributes_with_model(log_data, "mistral")
-phi_output, phi_time = extract_attributes_with_model(log_data, "phi")
-
-# Display the results
-print("\n🚀 **Comparison Results:**")
-print("\n🔹 Mistral Output:")
-print(json.dumps(mistral_output, indent=4))
-print(f"⏱️ Mistral Processing Time: {mistral_time:.2f} seconds")
-
-print("\n🔹 Phi Output:")
-print(json.dumps(phi_output, indent=4))
-print(f"⏱️ Phi Processing Time: {phi_time:.2f} seconds")
-
-# Compare processing time
-if mistral_time < phi_time:
-    print("\n✅ **Mistral was faster.**")
-elif phi_time < mistral_time:
-    print("\n✅ **Phi was faster.**")
-else:
-    print("\n⚖️ **Both models took the same time.**")
+if __name__ == "__main__":
+    # Run with both models
+    mistral_output, mistral_time = extract_attributes_with_model(log_data, "mistral")
+    phi_output, phi_time = extract_attributes_with_model(log_data, "phi")
+
+    # Display the results
+    print("\n🚀 **Comparison Results:**")
+    print("\n🔹 Mistral Output:")
+    print(json.dumps(mistral_output, indent=4))
+    print(f"⏱️ Mistral Processing Time: {mistral_time:.2f} seconds")
+
+    print("\n🔹 Phi Output:")
+    print(json.dumps(phi_output, indent=4))
+    print(f"⏱️ Phi Processing Time: {phi_time:.2f} seconds")
+
+    # Compare processing time
+    if mistral_time < phi_time:
+        print("\n✅ **Mistral was faster.**")
+    elif phi_time < mistral_time:
+        print("\n✅ **Phi was faster.**")
+    else:
+        print("\n⚖️ **Both models took the same time.**")
+
+    print(f"\n🔌 Connection Pool: {get_client().stats()}")
 
 
 """
@@ -0,0 +1,52 @@
+"""Confirm that Ollama reuses the KV cache for a static prompt prefix across calls."""
+
+import threading
+
+
+KEEP_ALIVE = "30m"  # Keeps the model, and the cached prefix with it, loaded between batches
+
+
+class PrefixReuseTracker:
+    """Compare each call's prompt_eval_count with the prompt size it was sent.
+
+    When the static prefix is served from the KV cache, Ollama only evaluates
+    the tokens after it, so prompt_eval_count drops well below the full prompt.
+    """
+
+    def __init__(self, prefix_tokens):
+        self.prefix_tokens = prefix_tokens
+        self.calls = 0
+        self.hits = 0
+        self.sent_tokens = 0
+        self.evaluated_tokens = 0
+        self.eval_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens, metadata):
+        """Record one call; returns True when the prefix looks reused."""
+        evaluated = (metadata or {}).get("prompt_eval_count")
+        if evaluated is None:
+            return None
+
+        # Token counts are tiktoken estimates, so allow half the prefix as slack
+        hit = evaluated < prompt_tokens - self.prefix_tokens / 2
+
+        with self._lock:
+            self.calls += 1
+            self.hits += hit
+            self.sent_tokens += prompt_tokens
+            self.evaluated_tokens += evaluated
+            self.eval_seconds += (metadata.get("prompt_eval_duration") or 0) / 1e9
+
+        print(f"🧠 prompt_eval_count={evaluated} of ~{prompt_tokens} tokens, prefix reused: {hit}")
+        return hit
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prefix_hits": self.hits,
+                "sent_tokens": self.sent_tokens,
+                "evaluated_tokens": self.evaluated_tokens,
+                "prompt_eval_seconds": round(self.eval_seconds, 3),
+            }
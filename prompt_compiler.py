@@ -0,0 +1,175 @@
+"""Compile declared prompt parts (instructions, schema, examples) into a minimal-token rendering.
+
+    python prompt_compiler.py           # Token counts before and after, per template
+    python prompt_compiler.py --check   # Plus an extraction-accuracy regression check against Ollama
+"""
+
+import argparse
+import json
+import re
+import sys
+import textwrap
+
+from tokenizer import count_tokens
+
+
+SPACES = re.compile(r"[ \t]+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+ACCURACY_TOLERANCE = 0.02  # Largest field-accuracy drop the compiled rendering may cost
+INDENT = "    "  # How the triple-quoted prompt blocks used to be indented
+
+
+def strip_text(text):
+    """Dedent, trim every line, collapse runs of spaces and drop blank lines."""
+    lines = (SPACES.sub(" ", line).strip() for line in textwrap.dedent(text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def compact_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def instruction_key(sentence):
+    return re.sub(r"[^a-z0-9]+", " ", sentence.lower()).strip()
+
+
+def dedupe_instructions(instructions):
+    """Instruction sentences, stripped, with repeats (ignoring case and punctuation) removed."""
+    seen = set()
+    sentences = []
+    for instruction in instructions:
+        for sentence in SENTENCE_END.split(strip_text(instruction)):
+            key = instruction_key(sentence)
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    return sentences
+
+
+def schema_skeleton(schema):
+    """Nested {field: type or "A|B|C"} outline of a JSON Schema, far shorter than the schema itself."""
+    if schema.get("type") == "array":
+        return [schema_skeleton(schema.get("items", {}))]
+    if schema.get("type") == "object":
+        return {key: schema_skeleton(subschema) for key, subschema in schema.get("properties", {}).items()}
+    if "enum" in schema:
+        return "|".join(schema["enum"])
+    return schema.get("type", "string")
+
+
+class PromptSpec:
+    """A static prompt declared as parts, rendered verbose (the old hand-written style) or compiled.
+
+    instructions are sentences or paragraphs, schema a JSON-serializable
+    outline, examples (log, record) pairs.
+    """
+
+    def __init__(self, name, instructions=(), schema=None, examples=()):
+        self.name = name
+        self.instructions = list(instructions)
+        self.schema = schema
+        self.examples = list(examples)
+
+    def verbose(self):
+        """Pretty-printed, indented rendering, as the prompts were written before compilation."""
+        parts = ["\n".join(self.instructions)]
+        if self.schema is not None:
+            parts.append("Schema:\n" + json.dumps(self.schema, ensure_ascii=False, indent=4))
+        if self.examples:
+            parts.append("Examples:\n" + "\n".join(
+                f'Log: "{log}"\nOutput:\n{json.dumps(record, ensure_ascii=False, indent=4)}'
+                for log, record in self.examples))
+        return "\n" + textwrap.indent("\n\n".join(parts), INDENT) + "\n"
+
+    def compile(self):
+        """Compact JSON, deduplicated instructions and no whitespace the model doesn't need."""
+        lines = dedupe_instructions(self.instructions)
+        if self.schema is not None:
+            lines.append("Schema:" + compact_json(self.schema))
+        for log, record in self.examples:
+            lines.append(f"Example:\nLog: {log}\nOutput:{compact_json(record)}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, model=None):
+        before = count_tokens(self.verbose(), model)
+        after = count_tokens(self.compile(), model)
+        return {"template": self.name, "before": before, "after": after,
+                "saved": 1 - after / before if before else 0.0}
+
+
+def print_reports(specs, model=None):
+    print("Before: PromptSpec.verbose(), a rebuilt pretty-printed rendering of each template, "
+          "not the exact text of the old hand-written prompts.")
+    print(f"{'Template':<24}{'Before':>8}{'After':>8}{'Saved':>8}")
+    for spec in specs:
+        report = spec.report(model)
+        print(f"{report['template']:<24}{report['before']:>8}{report['after']:>8}{report['saved']:>8.0%}")
+
+
+def field_accuracy(lines, records, expected):
+    """Share of expected leaf fields reproduced exactly; records are lined up with lines by timestamp."""
+    from record_retry import align_records
+    from result_sinks import flatten_schema, leaf
+    from log_schema import SERVER_LOG_SCHEMA
+
+    columns = [name for name, _ in flatten_schema(SERVER_LOG_SCHEMA)]
+    pairs, _ = align_records(lines, records)
+    by_index = dict(pairs)
+    matched = sum(
+        leaf(by_index.get(i), column) == leaf(expected_record, column)
+        for i, expected_record in enumerate(expected)
+        for column in columns
+    )
+    return matched / (len(expected) * len(columns))
+
+
+def extract(prefix, request, model, output_format):
+    """Map one request with a system prefix through /api/chat; returns the records."""
+    from ollama_client import get_client
+
+    payload = {
+        "model": model,
+        "messages": [{"role": "system", "content": prefix}, {"role": "user", "content": request}],
+        "format": output_format,
+        "options": {"temperature": 0},
+    }
+    response = get_client().chat(payload)
+    if response.status_code != 200:
+        print(f"❌ Error: {response.status_code} {response.text}")
+        return []
+    try:
+        records = json.loads(response.json()["message"]["content"])
+    except (KeyError, ValueError):
+        return []
+    return records if isinstance(records, list) else [records]
+
+
+def check_accuracy(spec, build_request, cases, model, output_format):
+    """Field accuracy of the verbose and compiled prefix on golden (log, record) cases."""
+    lines = [log for log, _ in cases]
+    expected = [record for _, record in cases]
+    request = build_request(lines)
+    return {
+        rendering: field_accuracy(lines, extract(prefix, request, model, output_format), expected)
+        for rendering, prefix in [("verbose", spec.verbose()), ("compiled", spec.compile())]
+    }
+
+
+if __name__ == "__main__":
+    import prompts
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Compare extraction accuracy on the golden cases")
+    parser.add_argument("--model", default=prompts.MODEL_NAME)
+    args = parser.parse_args()
+
+    print_reports(prompts.TEMPLATES, args.model)
+
+    if args.check:
+        accuracy = check_accuracy(prompts.BATCH_PREFIX, prompts.build_batch_request, prompts.GOLDEN_CASES,
+                                  args.model, prompts.BATCH_OUTPUT_FORMAT)
+        print(f"\n🎯 Field accuracy: verbose {accuracy['verbose']:.1%}, compiled {accuracy['compiled']:.1%}")
+        if accuracy["compiled"] < accuracy["verbose"] - ACCURACY_TOLERANCE:
+            print("❌ Compiled prompt lost accuracy")
+            sys.exit(1)
+        print("✅ No accuracy regression")
@@ -0,0 +1,109 @@
+"""Prompt templates of the pipelines, declared as instructions, schema and examples for prompt_compiler."""
+
+from log_schema import ALERT_LEVELS, SERVER_LOG_SCHEMA, STATES, array_schema, format_schema, yaml_to_json_schema
+from prompt_compiler import PromptSpec, schema_skeleton
+
+
+MODEL_NAME = "mistral"
+
+SCHEMA_HINTS = {
+    "timestamp": "ISO 8601 format",
+    "server": {"cpu": "CPU model", "memory": "RAM size", "disk": "Storage type"},
+    "status": {"state": "|".join(STATES), "temperature": "Numeric with °C", "alert_level": "|".join(ALERT_LEVELS)},
+}
+
+
+def server_log(timestamp, cpu, memory, disk, state, temperature, alert_level):
+    """(log line, expected record) for one server log."""
+    log = (f"{timestamp} Server CPU: {cpu}, Memory: {memory}, Disk: {disk}. "
+           f"Status: {state}, Temperature: {temperature}, Alert: {alert_level}.")
+    record = {
+        "timestamp": timestamp,
+        "server": {"cpu": cpu, "memory": memory, "disk": disk},
+        "status": {"state": state, "temperature": temperature, "alert_level": alert_level},
+    }
+    return log, record
+
+
+EXAMPLES = [server_log("2025-03-20 15:30:45", "Intel Xeon E5-2670", "64GB DDR4", "512GB SSD", "Running", "45°C", "None")]
+
+# Held out from the examples; prompt_compiler --check scores extraction on them
+GOLDEN_CASES = [
+    server_log("2025-03-20 15:35:22", "AMD EPYC 7742", "128GB DDR4", "1TB NVMe", "Idle", "40°C", "None"),
+    server_log("2025-03-20 15:40:10", "Intel Core i9-9900K", "32GB DDR4", "256GB NVMe", "Down", "80°C", "High"),
+    server_log("2025-03-20 15:45:55", "AMD Ryzen 9 5950X", "64GB DDR4", "2TB SSD", "Overload", "90°C", "High"),
+    server_log("2025-03-21 08:12:03", "Intel Xeon Gold 6248", "256GB DDR4", "4TB HDD", "Running", "52°C", "Low"),
+]
+
+# langchain_basic: static system prefix, then only the logs per batch
+BATCH_PREFIX = PromptSpec("langchain_basic", [
+    "You are an expert log parser. Your task is to map server logs to a given JSON schema.",
+    "The logs contain information about server hardware, status, and alerts.",
+    "Extract the relevant attributes and map them to the schema accurately.",
+    "Map each log to the schema using the same format as the examples. Output the result as a JSON array.",
+], SCHEMA_HINTS, EXAMPLES)
+BATCH_REQUEST = "Logs:\n"
+BATCH_OUTPUT_FORMAT = format_schema(array_schema(SERVER_LOG_SCHEMA))
+
+
+def build_batch_request(lines):
+    return BATCH_REQUEST + "\n".join(lines)
+
+
+# Hybrid extraction: the LLM only fills the fields the key/value pre-parser could not
+FIELD_HINTS = dict(
+    [("timestamp", SCHEMA_HINTS["timestamp"])],
+    **{f"{section}.{key}": hint for section in ("server", "status") for key, hint in SCHEMA_HINTS[section].items()},
+)
+FILL_PREFIX = PromptSpec("hybrid_fill", [
+    "Each text is what is left of a server log after its known fields were parsed.",
+    "Fill only the listed fields from that text, in the formats below.",
+    "Output a JSON array with one object per text: its i and the listed fields, null when a field is not in the text.",
+], FIELD_HINTS)
+
+# local_rag: the schema document embedded in FAISS and retrieved as context
+RAG_SCHEMA = PromptSpec("local_rag", schema=SCHEMA_HINTS, examples=EXAMPLES)
+RAG_TASK = "Map the log to the schema and output as JSON."
+
+
+def build_rag_prompt(context, log):
+    return f"Context:\n{context.strip()}\nLog:\n{log}\n{RAG_TASK}"
+
+
+# tokenize_logs / tokenize_schema: nested server schema, declared in YAML
+NESTED_YAML_SCHEMA = """
+server:
+  timestamp: string
+  hardware:
+    cpu: string
+    memory: string
+    disk: string
+  status:
+    state: string
+    temperature: string
+"""
+NESTED_SCHEMA = yaml_to_json_schema(NESTED_YAML_SCHEMA)
+NESTED_EXAMPLES = [(
+    "[2025-03-20 15:30:45] CPU: Intel Xeon E5-2670, Memory: 64GB DDR4, Status: Running, Disk: 512GB SSD, "
+    "Temperature: 45°C",
+    {"server": {"timestamp": "2025-03-20 15:30:45",
+                "hardware": {"cpu": "Intel Xeon E5-2670", "memory": "64GB DDR4", "disk": "512GB SSD"},
+                "status": {"state": "Running", "temperature": "45°C"}}},
+)]
+
+TOKENIZE_LOGS_PREFIX = PromptSpec("tokenize_logs", [
+    "You are a log parsing AI.",
+    "Your task is to extract attributes from logs according to the given schema.",
+    "Extract attributes and format them into JSON according to the schema.",
+    "Ensure valid JSON formatting without explanations.",
+], schema_skeleton(NESTED_SCHEMA))
+
+TOKENIZE_SCHEMA_PREFIX = PromptSpec("tokenize_schema", [
+    "Extract attributes and their values from the following logs according to the provided schema.",
+    "Strictly output as a valid, compact JSON array with no explanation or extra formatting.",
+    "If the JSON cannot be constructed, return an empty JSON array []",
+    "Only return valid JSON. Do not describe or explain anything.",
+    "No markdown, code blocks, or comments.",
+], schema_skeleton(NESTED_SCHEMA), NESTED_EXAMPLES)
+
+TEMPLATES = [BATCH_PREFIX, FILL_PREFIX, RAG_SCHEMA, TOKENIZE_LOGS_PREFIX, TOKENIZE_SCHEMA_PREFIX]
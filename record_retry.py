@@ -0,0 +1,161 @@
+"""Record-level recovery of batch output: salvage what parses and retry only the lines left over."""
+
+import asyncio
+import json
+import re
+import threading
+
+
+RETRY_BATCH_SIZE = 2  # Lines per retry call; small, so one bad line does not sink the others again
+MAX_RETRIES = 2  # Retry rounds before a line is given up
+BACKOFF = 0.5  # Seconds before the first retry round, doubled each round
+MAX_BACKOFF = 8.0
+
+TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}")
+
+decoder = json.JSONDecoder()
+
+
+def salvage_records(text):
+    """Parse as many records as possible from a JSON array that may be truncated or damaged.
+
+    Returns (records, complete); complete is False when anything was skipped,
+    so the caller knows not to cache the answer.
+    """
+    text = text.strip()
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    else:
+        return (value if isinstance(value, list) else [value]), True
+
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if not starts:
+        return [], False
+
+    records = []
+    position = min(starts)
+    if text[position] == "[":
+        position += 1
+
+    while position < len(text):
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text) or text[position] == "]":
+            break
+        try:
+            value, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            # Skip the damaged element and resume at the next object
+            position = text.find("{", position + 1)
+            if position == -1:
+                break
+            continue
+        if isinstance(value, dict):
+            records.append(value)
+
+    return records, False
+
+
+def record_timestamp(record):
+    value = record.get("timestamp") if isinstance(record, dict) else None
+    match = TIMESTAMP.search(value.replace("T", " ")) if isinstance(value, str) else None
+    return match.group(0) if match else None
+
+
+def align_records(lines, records):
+    """Match records to input lines by timestamp, then by position.
+
+    Returns (pairs, missing): (index, record) pairs and the indices of the
+    lines no record could be matched to. Records that match no line are dropped.
+    """
+    by_timestamp = {}
+    for index, line in enumerate(lines):
+        match = TIMESTAMP.search(line)
+        if match:
+            by_timestamp.setdefault(match.group(0).replace("T", " "), []).append(index)
+
+    pairs = []
+    unplaced = []
+    for record in records:
+        indices = by_timestamp.get(record_timestamp(record))
+        if indices:
+            pairs.append((indices.pop(0), record))
+        else:
+            unplaced.append(record)
+
+    placed = {index for index, _ in pairs}
+    missing = [index for index in range(len(lines)) if index not in placed]
+
+    # The rest can only be paired by position, and only if the counts agree
+    if unplaced and len(unplaced) == len(missing):
+        pairs.extend(zip(missing, unplaced))
+        missing = []
+
+    return sorted(pairs, key=lambda pair: pair[0]), missing
+
+
+class RetryLane:
+    """Re-send only the lines a batch failed on, in small batches with exponential backoff."""
+
+    def __init__(self, batch_size=RETRY_BATCH_SIZE, max_retries=MAX_RETRIES, backoff=BACKOFF,
+                 max_backoff=MAX_BACKOFF):
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retried = 0
+        self.recovered = 0
+        self.given_up = 0
+        self._lock = threading.Lock()
+
+    def delays(self):
+        """Seconds to wait before each retry round."""
+        for attempt in range(self.max_retries):
+            yield min(self.backoff * 2 ** attempt, self.max_backoff)
+
+    def batches(self, indices):
+        for i in range(0, len(indices), self.batch_size):
+            yield indices[i:i + self.batch_size]
+
+    async def run(self, missing, call):
+        """Retry the missing line indices.
+
+        call is an async function (indices) -> (pairs, missing) that maps the
+        given lines and answers in the same indices. Returns (pairs, missing).
+        """
+        pairs = []
+        for delay in self.delays():
+            if not missing:
+                break
+            await asyncio.sleep(delay)
+            self._count(retried=len(missing))
+
+            # One call at a time: the retries run inside the failed batch's concurrency slot
+            still_missing = []
+            for batch in self.batches(missing):
+                try:
+                    batch_pairs, batch_missing = await call(batch)
+                except Exception as e:
+                    print(f"❌ Retry failed: {e}")
+                    still_missing.extend(batch)
+                    continue
+                pairs.extend(batch_pairs)
+                still_missing.extend(batch_missing)
+
+            self._count(recovered=len(missing) - len(still_missing))
+            missing = still_missing
+
+        self._count(given_up=len(missing))
+        return pairs, missing
+
+    def _count(self, retried=0, recovered=0, given_up=0):
+        with self._lock:
+            self.retried += retried
+            self.recovered += recovered
+            self.given_up += given_up
+
+    def stats(self):
+        with self._lock:
+            return {"retried": self.retried, "recovered": self.recovered, "given_up": self.given_up}
@@ -0,0 +1,283 @@
+"""Pluggable sinks that write mapped records as soon as their batch finishes."""
+
+import contextlib
+import json
+import os
+import sys
+from datetime import datetime
+
+from log_schema import SERVER_LOG_SCHEMA
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only ParquetSink needs it
+    pa = pq = None
+
+
+ROW_GROUP_SIZE = 65_536  # Rows buffered before a Parquet row group is written
+DICTIONARY_FIELDS = {"server.cpu"}  # Low-cardinality strings dictionary-encoded besides the schema's enums
+
+
+def encode_record(offset, record):
+    """One NDJSON line; offset is the record's source line, or None if unknown."""
+    return json.dumps({"offset": offset, "record": record}, ensure_ascii=False) + "\n"
+
+
+class ResultSink:
+    """Base sink: write(offset, record) for every mapped record, then close().
+
+    begin_window(start) announces the window of lines starting at offset
+    start whose records come next, up to its last flush().
+    """
+
+    def begin_window(self, start):
+        pass
+
+    def write(self, offset, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ListSink(ResultSink):
+    """Keep records in memory; only for small jobs and backwards-compatible callers."""
+
+    def __init__(self):
+        self.items = []
+
+    def write(self, offset, record):
+        self.items.append((offset, record))
+
+    def records(self):
+        """Records in source order, unplaceable ones last."""
+        placed = sorted((item for item in self.items if item[0] is not None), key=lambda item: item[0])
+        return [record for _, record in placed] + [record for offset, record in self.items if offset is None]
+
+
+class NDJSONSink(ResultSink):
+    """Append records to an NDJSON stream, flushing per batch so memory stays flat."""
+
+    def __init__(self, path=None, stream=None):
+        self.path = path
+        self.stream = stream if stream is not None else open(path, "a", encoding="utf-8")
+        self.count = 0
+
+    def write(self, offset, record):
+        self.stream.write(encode_record(offset, record))
+        self.count += 1
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.path is not None:
+            self.stream.close()
+
+
+class StdoutSink(NDJSONSink):
+    """NDJSON to stdout, for piping into other tools.
+
+    Used as a context manager, it sends the pipeline's status prints to
+    stderr until closed, so stdout carries nothing but records.
+    """
+
+    def __init__(self):
+        super().__init__(stream=sys.stdout)
+        self._redirect = None
+
+    def __enter__(self):
+        self._redirect = contextlib.redirect_stdout(sys.stderr)
+        self._redirect.__enter__()
+        return self
+
+    def close(self):
+        super().close()
+        if self._redirect is not None:
+            self._redirect.__exit__(None, None, None)
+            self._redirect = None
+
+
+class RotatingNDJSONSink(NDJSONSink):
+    """NDJSON files rolled over at max_bytes, keeping backup_count old files (.1, .2, ...)."""
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, backup_count=5):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def rotate(self):
+        self.stream.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stream = open(self.path, "a", encoding="utf-8")
+
+    def write(self, offset, record):
+        line = encode_record(offset, record)
+        if self.stream.tell() + len(line.encode("utf-8")) > self.max_bytes and self.stream.tell() > 0:
+            self.rotate()
+        self.stream.write(line)
+        self.count += 1
+
+
+def flatten_schema(schema, prefix=""):
+    """[(column, JSON Schema)] for the leaf fields of an object schema, nested keys joined by dots."""
+    columns = []
+    for key, subschema in schema.get("properties", {}).items():
+        name = prefix + key
+        if subschema.get("type") == "object":
+            columns.extend(flatten_schema(subschema, name + "."))
+        else:
+            columns.append((name, subschema))
+    return columns
+
+
+def leaf(record, name):
+    """Value of a dotted column in a nested record, None when any level is missing."""
+    value = record
+    for key in name.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def column_kind(name, schema):
+    if name.rsplit(".", 1)[-1] == "timestamp":
+        return "timestamp"
+    if "enum" in schema or name in DICTIONARY_FIELDS:
+        return "dictionary"
+    return schema.get("type", "string")
+
+
+def arrow_type(kind):
+    return {
+        "timestamp": pa.timestamp("s"),
+        "dictionary": pa.dictionary(pa.int32(), pa.string()),
+        "number": pa.float64(),
+        "integer": pa.int64(),
+        "boolean": pa.bool_(),
+    }.get(kind, pa.string())
+
+
+def coerce(value, kind, enum=None):
+    """Value converted to its column's type; None when the model's output doesn't fit it."""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    if enum is not None and value not in enum:
+        return None
+    try:
+        if kind == "timestamp":
+            return datetime.fromisoformat(str(value)[:19].replace(" ", "T"))
+        if kind == "number":
+            return float(value)
+        if kind == "integer":
+            return int(value)
+        if kind == "boolean":
+            return value if isinstance(value, bool) else None
+    except ValueError:
+        return None
+    return str(value)
+
+
+class ParquetSink(ResultSink):
+    """Records flattened into typed Parquet columns (server.cpu, status.state, ...), as a dataset directory.
+
+    Every flush closes one complete part file named after the window's first
+    offset and the flush's number within the window
+    (part-000000001234-000.parquet), written under a hidden temporary name
+    and renamed when done. A restart resuming from a checkpoint therefore
+    adds parts instead of truncating earlier ones, and a crash leaves no
+    footerless file behind; a window redone after a crash first drops the
+    parts it left, so no row is written twice. Within a part, a row group is
+    written every row_group_size rows. Enum fields and DICTIONARY_FIELDS are
+    dictionary-encoded. Read it back with pyarrow.parquet.read_table(path).
+    """
+
+    def __init__(self, path, schema=SERVER_LOG_SCHEMA, row_group_size=ROW_GROUP_SIZE, compression="zstd"):
+        if pa is None:
+            raise ImportError("ParquetSink needs pyarrow: pip install pyarrow")
+        if os.path.isfile(path):
+            raise ValueError(f"{path} is a file; ParquetSink writes a directory of part files")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = [(name, column_kind(name, subschema), subschema.get("enum"))
+                        for name, subschema in flatten_schema(schema)]
+        self.schema = pa.schema([("offset", pa.int64())]
+                                + [(name, arrow_type(kind)) for name, kind, _ in self.columns])
+        self.dictionary = [name for name, kind, _ in self.columns if kind == "dictionary"]
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.writer = None
+        self.window = 0  # First offset of the current window, which names its parts
+        self.sequence = 0  # Parts of the current window closed so far
+        self.offsets = []
+        self.values = [[] for _ in self.columns]
+        self.count = 0
+        self.row_groups = 0
+        self.parts = 0
+
+    def _part_name(self, window, sequence):
+        return f"part-{window:012d}-{sequence:03d}.parquet"
+
+    def begin_window(self, start):
+        """Start the parts of the window at offset start, dropping any an interrupted run left for it."""
+        self.flush()
+        self.window = start
+        self.sequence = 0
+        prefix = self._part_name(start, 0)[:-len("000.parquet")]
+        for name in os.listdir(self.path):
+            if name.startswith(prefix) and name.endswith(".parquet"):
+                os.remove(os.path.join(self.path, name))
+
+    def write(self, offset, record):
+        self.offsets.append(offset)
+        for values, (name, kind, enum) in zip(self.values, self.columns):
+            values.append(coerce(leaf(record, name), kind, enum))
+        self.count += 1
+        if len(self.offsets) >= self.row_group_size:
+            self._write_row_group()
+
+    def _tmp_path(self):
+        return os.path.join(self.path, f".part-{os.getpid()}.parquet.tmp")
+
+    def _write_row_group(self):
+        if not self.offsets:
+            return
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self._tmp_path(), self.schema, compression=self.compression,
+                                           use_dictionary=self.dictionary)
+        arrays = [pa.array(self.offsets, pa.int64())]
+        arrays += [pa.array(values, arrow_type(kind)) for values, (_, kind, _) in zip(self.values, self.columns)]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.row_groups += 1
+        self.offsets = []
+        self.values = [[] for _ in self.columns]
+
+    def flush(self):
+        """Close the current part file, so every record written so far is durable and readable."""
+        self._write_row_group()
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        os.replace(self._tmp_path(), os.path.join(self.path, self._part_name(self.window, self.sequence)))
+        self.sequence += 1
+        self.parts += 1
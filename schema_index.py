@@ -0,0 +1,163 @@
+"""Versioned FAISS store for the schema catalog: incremental updates, mmap loading, JSON metadata.
+
+    faiss_index/
+        index.faiss     raw FAISS index (IndexIDMap2), memory-mapped when unchanged
+        manifest.json   embedding model, dimension and one entry per schema
+
+Each schema is keyed by its name and carries a hash of its content, so only
+added, changed or removed schemas are embedded or dropped on the next load.
+Metadata is plain JSON; nothing is unpickled.
+"""
+
+import hashlib
+import json
+import os
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain.docstore.document import Document
+
+
+MANIFEST_VERSION = 1
+INDEX_NAME = "index.faiss"
+MANIFEST_NAME = "manifest.json"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def schema_id(schema):
+    """Stable key for a schema: its name, or its content hash when unnamed."""
+    return schema.get("name") or content_hash(schema["content"])
+
+
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def write_atomic(path, write):
+    """Write to a temp file and rename it over path, so readers never see a partial file."""
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def read_mmap(path):
+    """Memory-map a stored index; index types FAISS cannot map are read normally."""
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+def diff_schemas(manifest, schemas):
+    """Return (added, removed): schemas to embed and manifest ids to drop."""
+    current = {schema_id(schema): schema for schema in schemas}
+    stored = manifest["documents"]
+
+    removed = [doc_id for doc_id, doc in stored.items()
+               if doc_id not in current or doc["hash"] != content_hash(current[doc_id]["content"])]
+    added = [schema for doc_id, schema in current.items()
+             if doc_id not in stored or doc_id in removed]
+    return added, removed
+
+
+class SchemaIndex:
+    """Load, update and save the schema FAISS index under one directory."""
+
+    def __init__(self, path, embeddings, model_id):
+        self.path = path
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.index = None
+        self.manifest = None
+
+    @property
+    def index_file(self):
+        return os.path.join(self.path, INDEX_NAME)
+
+    def _new_manifest(self, dimension):
+        return {"version": MANIFEST_VERSION, "embedding_model": self.model_id, "dimension": dimension,
+                "next_id": 0, "documents": {}}
+
+    def _embed(self, schemas):
+        vectors = self.embeddings.embed_documents([schema["content"] for schema in schemas])
+        return np.asarray(vectors, dtype=np.float32)
+
+    def sync(self, schemas):
+        """Bring the stored index in line with schemas; returns (added, removed) counts."""
+        manifest = read_manifest(self.path)
+        usable = (manifest is not None and manifest["embedding_model"] == self.model_id
+                  and os.path.exists(self.index_file))
+
+        if usable:
+            added, removed = diff_schemas(manifest, schemas)
+            if not added and not removed:
+                # Nothing to write, so the index can stay on disk and be paged in lazily
+                self.index = read_mmap(self.index_file)
+                self.manifest = manifest
+                return 0, 0
+            index = faiss.read_index(self.index_file)
+        else:
+            added, removed = list(schemas), []
+            manifest = None
+            index = None
+
+        vectors = self._embed(added) if added else None
+        if manifest is None:
+            dimension = vectors.shape[1] if vectors is not None else len(self.embeddings.embed_query(""))
+            manifest = self._new_manifest(dimension)
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+        if removed:
+            ids = [manifest["documents"].pop(doc_id)["id"] for doc_id in removed]
+            index.remove_ids(np.asarray(ids, dtype=np.int64))
+
+        if added:
+            ids = np.arange(manifest["next_id"], manifest["next_id"] + len(added), dtype=np.int64)
+            index.add_with_ids(vectors, ids)
+            manifest["next_id"] += len(added)
+            for doc_id, schema in zip(ids, added):
+                manifest["documents"][schema_id(schema)] = {
+                    "id": int(doc_id), "hash": content_hash(schema["content"]), "content": schema["content"],
+                }
+
+        os.makedirs(self.path, exist_ok=True)
+        write_atomic(self.index_file, lambda tmp: faiss.write_index(index, tmp))
+        write_atomic(os.path.join(self.path, MANIFEST_NAME), lambda tmp: self._dump(manifest, tmp))
+
+        self.index = index
+        self.manifest = manifest
+        return len(added), len(removed)
+
+    @staticmethod
+    def _dump(manifest, tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    def vectorstore(self):
+        """Wrap the loaded index as a LangChain FAISS store; search ids map straight to schemas."""
+        documents = self.manifest["documents"]
+        docstore = InMemoryDocstore({doc_id: Document(page_content=doc["content"], metadata={"name": doc_id})
+                                     for doc_id, doc in documents.items()})
+        index_to_docstore_id = {doc["id"]: doc_id for doc_id, doc in documents.items()}
+        return FAISS(self.embeddings, self.index, docstore, index_to_docstore_id)
+
+
+def load_schema_index(path, schemas, embeddings, model_id):
+    """Open the store at path, updating only the schemas that changed."""
+    store = SchemaIndex(path, embeddings, model_id)
+    added, removed = store.sync(schemas)
+    if added or removed:
+        print(f"✅ Schema index updated: {added} added, {removed} removed")
+    else:
+        print(f"🔥 Loaded schema index from {path} (mmap)")
+    return store.vectorstore()
@@ -0,0 +1,155 @@
+"""Resident ingestion service: models and indexes stay warm, callers share micro-batches.
+
+    uvicorn service:app --port 8000
+
+    curl -X POST localhost:8000/v1/logs -H 'Content-Type: application/json' \
+         -d '{"lines": ["2025-03-20 15:30:45 Server CPU: ..."]}'
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+import langchain_basic
+from concurrency import use_limiter
+from endpoint_pool import get_pool
+from log_schema import validate_record
+from log_templates import TemplateMiner
+from micro_batcher import MAX_WAIT, MicroBatcher
+from response_cache import get_cache
+from telemetry import get_telemetry, stage
+
+
+SERVICE_MAX_WAIT = float(os.environ.get("SERVICE_MAX_WAIT", MAX_WAIT))  # Seconds a micro-batch waits to fill
+SERVICE_RAG = os.environ.get("SERVICE_RAG", "1") == "1"  # Load the embeddings model and FAISS index at startup
+SERVICE_HYBRID = os.environ.get("SERVICE_HYBRID", "0") == "1"  # Parse key/value text locally, LLM fills the rest
+MAX_LINES_PER_REQUEST = 10_000
+
+
+class LogRequest(BaseModel):
+    line: Optional[str] = None
+    lines: List[str] = []
+
+    def all_lines(self):
+        return ([self.line] if self.line is not None else []) + self.lines
+
+
+class Service:
+    """Everything loaded once per process and shared by all requests; LLM clients live in the endpoint pool."""
+
+    def __init__(self):
+        self.miner = TemplateMiner()
+        self.batcher = None
+        self.limiter = None
+        self.rag_index = None
+        self.rag_llm = None
+
+    async def start(self):
+        async def mapper(lines):
+            with stage("service"):
+                return await langchain_basic.amap_lines_balanced(lines, langchain_basic.MODEL_NAME, validate_record)
+
+        if SERVICE_HYBRID:
+            mapper = langchain_basic.hybrid_mapper(mapper)
+
+        async def worker(batch):
+            with use_limiter(self.limiter):
+                return await langchain_basic.amap_chunk(batch, mapper, self.miner)
+
+        overhead = langchain_basic.PROMPT_COUNTER.static_tokens
+        # The service's own limiter, on the service's event loop
+        self.limiter = langchain_basic.run_limiter(langchain_basic.MODEL_NAME)
+        self.batcher = MicroBatcher(worker, overhead, langchain_basic.BUDGET, SERVICE_MAX_WAIT,
+                                    limiter=self.limiter).start()
+
+        if SERVICE_RAG:
+            import local_rag
+            self.rag_index = await asyncio.to_thread(local_rag.create_faiss_index, local_rag.schemas)
+            self.rag_llm = local_rag.get_rag_llm()
+
+    async def stop(self):
+        await self.batcher.stop()
+
+    def metrics(self):
+        metrics = {
+            "batcher": self.batcher.stats(),
+            "concurrency": self.limiter.stats(),
+            "endpoints": get_pool().stats(),
+            "templates": self.miner.stats(),
+            "pre_parser": langchain_basic.pre_parser.stats(),
+            "prefix_reuse": langchain_basic.prefix_tracker.stats(),
+            "tokens": langchain_basic.token_accounting.stats(),
+            "retry_lane": langchain_basic.retry_lane.stats(),
+            "response_cache": get_cache().stats(),
+            "telemetry": get_telemetry().summary(),
+        }
+        if self.rag_index is not None:
+            metrics["embedding_cache"] = self.rag_index.embeddings.stats()
+        return metrics
+
+
+service = Service()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await service.start()
+    print("🚀 Ingestion service ready")
+    yield
+    await service.stop()
+
+
+app = FastAPI(title="llm-local ingestion", lifespan=lifespan)
+
+
+def request_lines(request):
+    lines = request.all_lines()
+    if not lines:
+        raise HTTPException(status_code=400, detail="Send 'line' or 'lines'.")
+    if len(lines) > MAX_LINES_PER_REQUEST:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_LINES_PER_REQUEST} lines per request.")
+    return lines
+
+
+@app.post("/v1/logs")
+async def map_logs(request: LogRequest):
+    """Map log lines to the schema; one record (or null) per line, in request order."""
+    return {"records": await service.batcher.submit(request_lines(request))}
+
+
+@app.post("/v1/rag")
+async def map_logs_with_rag(request: LogRequest):
+    """Map log lines with retrieved schema context, using the warm FAISS index."""
+    if service.rag_index is None:
+        raise HTTPException(status_code=503, detail="RAG is disabled (SERVICE_RAG=0).")
+    import local_rag
+    records = await asyncio.to_thread(local_rag.process_logs_with_rag, request_lines(request),
+                                      service.rag_index, None, service.rag_llm)
+    return {"records": records}
+
+
+@app.get("/metrics")
+async def metrics():
+    return service.metrics()
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-call Ollama timing histograms in the Prometheus text format."""
+    return PlainTextResponse(get_telemetry().prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "queue_depth": service.batcher.queue.qsize()}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.environ.get("SERVICE_HOST", "127.0.0.1"), port=int(os.environ.get("SERVICE_PORT", "8000")))
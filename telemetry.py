@@ -0,0 +1,198 @@
+"""Per-call Ollama timings, tagged by model, endpoint and stage, as Prometheus histograms and JSONL traces.
+
+Every Ollama answer carries total_duration, load_duration,
+prompt_eval_duration and eval_duration (nanoseconds) plus prompt_eval_count
+and eval_count; together they show whether time goes to loading the model,
+evaluating the prompt or decoding. Set LLM_TRACE_PATH to append one JSON
+line per call.
+"""
+
+import bisect
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+DURATION_FIELDS = ["total_duration", "load_duration", "prompt_eval_duration", "eval_duration"]
+COUNT_FIELDS = ["prompt_eval_count", "eval_count"]
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)  # Seconds
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384)
+TRACE_PATH = os.environ.get("LLM_TRACE_PATH")  # JSON-lines trace file; unset = no traces
+DEFAULT_STAGE = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "main"
+
+_stage = contextvars.ContextVar("stage", default=DEFAULT_STAGE)
+
+
+@contextmanager
+def stage(name):
+    """Tag calls made inside the block (same thread or task) with a pipeline stage."""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def endpoint_of(url):
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else "unknown"
+
+
+def timings(metadata):
+    """Ollama's timing fields in seconds and tokens, from a response body or LangChain response_metadata."""
+    values = {}
+    for field in DURATION_FIELDS:
+        if metadata.get(field) is not None:
+            values[field] = metadata[field] / 1e9
+    usage = metadata.get("usage") or {}  # /v1/chat/completions reports counts only
+    for field, usage_field in zip(COUNT_FIELDS, ["prompt_tokens", "completion_tokens"]):
+        value = metadata.get(field, usage.get(usage_field))
+        if value is not None:
+            values[field] = value
+    return values
+
+
+def metric_name(field):
+    if field.endswith("_count"):
+        return f"ollama_{field[:-len('_count')]}_tokens"
+    return f"ollama_{field}_seconds"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Telemetry:
+    """Histograms of every recorded call, keyed by metric and (model, endpoint, stage)."""
+
+    def __init__(self, trace_path=TRACE_PATH):
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "a", encoding="utf-8", buffering=1) if trace_path else None
+
+    def _observe(self, metric, labels, value, buckets):
+        key = (metric, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        self.histograms[key].observe(value)
+
+    def record(self, metadata, model=None, endpoint=None, stage=None, wall_seconds=None):
+        """Record one call; returns its trace, or None when metadata had no timings."""
+        metadata = metadata or {}
+        values = timings(metadata)
+        if not values:
+            return None
+
+        labels = (model or metadata.get("model") or "unknown", endpoint or "unknown", stage or _stage.get())
+        trace = dict(zip(["model", "endpoint", "stage"], labels), time=time.time(), **values)
+        if wall_seconds is not None:
+            trace["wall_seconds"] = wall_seconds
+        if values.get("prompt_eval_duration"):
+            trace["prompt_tokens_per_second"] = values.get("prompt_eval_count", 0) / values["prompt_eval_duration"]
+        if values.get("eval_duration"):
+            trace["eval_tokens_per_second"] = values.get("eval_count", 0) / values["eval_duration"]
+
+        with self._lock:
+            for field, value in values.items():
+                self._observe(metric_name(field), labels, value,
+                              TOKEN_BUCKETS if field in COUNT_FIELDS else DURATION_BUCKETS)
+            if wall_seconds is not None:
+                self._observe("llm_call_wall_seconds", labels, wall_seconds, DURATION_BUCKETS)
+            if self._trace is not None:
+                self._trace.write(json.dumps(trace) + "\n")
+        return trace
+
+    def record_response(self, response, stage=None):
+        """Record a non-streaming Ollama HTTP response, if its body carries timings."""
+        if response.status_code != 200:
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        if not isinstance(body, dict):
+            return None
+        return self.record(body, endpoint=endpoint_of(response.url), stage=stage,
+                           wall_seconds=response.elapsed.total_seconds())
+
+    def prometheus_text(self):
+        """All histograms in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self.histograms.items(), key=lambda item: item[0])
+            lines = []
+            current = None
+            for (metric, (model, endpoint, stage)), histogram in items:
+                if metric != current:
+                    lines.append(f"# TYPE {metric} histogram")
+                    current = metric
+                labels = f'model="{escape(model)}",endpoint="{escape(endpoint)}",stage="{escape(stage)}"'
+                lines.extend(histogram.lines(metric, labels))
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Per model: calls, and the share of server time spent loading, evaluating the prompt and decoding."""
+        totals = {}
+        with self._lock:
+            for (metric, (model, _, _)), histogram in self.histograms.items():
+                model_totals = totals.setdefault(model, {})
+                model_totals[metric] = model_totals.get(metric, 0.0) + histogram.sum
+                if metric == metric_name("total_duration"):
+                    model_totals["calls"] = model_totals.get("calls", 0) + histogram.count
+
+        summary = {}
+        for model, model_totals in totals.items():
+            total = model_totals.get(metric_name("total_duration")) or 0.0
+            share = lambda field: model_totals.get(metric_name(field), 0.0) / total if total else None
+            summary[model] = {
+                "calls": model_totals.get("calls", 0),
+                "server_seconds": total,
+                "load_share": share("load_duration"),
+                "prompt_eval_share": share("prompt_eval_duration"),
+                "eval_share": share("eval_duration"),
+            }
+        return summary
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Process-wide shared telemetry."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
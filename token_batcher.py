@@ -0,0 +1,112 @@
+"""Pack log lines into LLM batches by token count instead of a fixed line count."""
+
+import itertools
+import os
+from collections import namedtuple
+
+from tokenizer import count_tokens_batch
+
+
+COUNT_CHUNK = 1024  # Lines counted per encode_ordinary_batch call
+OUTPUT_TOKENS_PER_LINE = 96  # One mapped server-log record as compact JSON
+CONTEXT_HEADROOM = 1.25  # Model tokenizers split text finer than cl100k_base
+
+TokenBudget = namedtuple("TokenBudget", ["prompt_tokens", "output_tokens"])
+
+MODEL_BUDGETS = {
+    "mistral": TokenBudget(prompt_tokens=6144, output_tokens=2048),
+    "phi": TokenBudget(prompt_tokens=1536, output_tokens=512),
+}
+DEFAULT_BUDGET = TokenBudget(prompt_tokens=3072, output_tokens=1024)
+
+# Generated tokens per second, from the runs recorded in phi.py and langchain_basic.py (CPU-only);
+# set DECODE_TOKENS_PER_SECOND to what your hardware does
+MODEL_DECODE_RATES = {"mistral": 4.0, "phi": 20.0}
+DEFAULT_DECODE_RATE = 4.0
+DECODE_SHARE = 0.75  # Share of the call timeout decoding may use; the rest goes to prompt eval and loading
+
+
+def decode_rate(model):
+    configured = os.environ.get("DECODE_TOKENS_PER_SECOND")
+    if configured:
+        return float(configured)
+    return MODEL_DECODE_RATES.get(model.split(":")[0], DEFAULT_DECODE_RATE)
+
+
+def budget_for(model, timeout=None):
+    """Token budget for a model name such as "mistral" or "phi:latest".
+
+    With timeout (seconds per call), the output budget is cut to what the
+    model can decode in time, so a full batch never ends in a timeout.
+    """
+    budget = MODEL_BUDGETS.get(model.split(":")[0], DEFAULT_BUDGET)
+    if timeout is None:
+        return budget
+    decodable = int(timeout * DECODE_SHARE * decode_rate(model))
+    return budget._replace(output_tokens=max(OUTPUT_TOKENS_PER_LINE, min(budget.output_tokens, decodable)))
+
+
+def context_size(budget):
+    """num_ctx to request from Ollama so a full batch is never truncated."""
+    return int((budget.prompt_tokens + budget.output_tokens) * CONTEXT_HEADROOM)
+
+
+class TokenBatch(list):
+    """Lines packed into one LLM call, with their token accounting."""
+
+    def __init__(self, overhead_tokens=0):
+        super().__init__()
+        self.offsets = []  # Source position of each line
+        self.prompt_tokens = overhead_tokens
+        self.output_tokens = 0
+
+    def usage(self):
+        return {
+            "lines": len(self),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+def counted_lines(lines):
+    """Yield (line, token count), counting COUNT_CHUNK lines per bulk call so input stays lazy."""
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, COUNT_CHUNK))
+        if not chunk:
+            return
+        yield from zip(chunk, count_tokens_batch(chunk))
+
+
+def pack_batches(lines, overhead_tokens, budget=DEFAULT_BUDGET, output_per_line=OUTPUT_TOKENS_PER_LINE, offsets=None):
+    """Yield TokenBatches that fill the prompt and expected-output budgets.
+
+    overhead_tokens is the cost of the static prompt (context, schema,
+    examples), paid once per batch. A line too long for any batch still gets
+    a batch of its own. offsets gives each line's source position and
+    defaults to its index in lines.
+    """
+    batch = TokenBatch(overhead_tokens)
+
+    if offsets is None:
+        offsets = itertools.count()
+
+    for offset, (line, tokens) in zip(offsets, counted_lines(lines)):
+        # +1 for the newline joining the line into the prompt
+        line_tokens = tokens + 1
+
+        fits = (
+            batch.prompt_tokens + line_tokens <= budget.prompt_tokens
+            and batch.output_tokens + output_per_line <= budget.output_tokens
+        )
+        if batch and not fits:
+            yield batch
+            batch = TokenBatch(overhead_tokens)
+
+        batch.append(line)
+        batch.offsets.append(offset)
+        batch.prompt_tokens += line_tokens
+        batch.output_tokens += output_per_line
+
+    if batch:
+        yield batch
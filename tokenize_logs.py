@@ -1,24 +1,18 @@
 import json
 import time
-import tiktoken
-import requests
-import re
+from log_schema import array_schema
+from ollama_client import get_client
+from prefix_cache import KEEP_ALIVE
+from prompts import NESTED_SCHEMA, TOKENIZE_LOGS_PREFIX
+from response_cache import cache_key, get_cache
+from telemetry import get_telemetry
+from token_batcher import OUTPUT_TOKENS_PER_LINE
+from tokenizer import TokenAccounting, count_static, count_tokens, encode
 
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
 MODEL_NAME = "mistral"
 
-yaml_schema = """
-server:
-  timestamp: string
-  hardware:
-    cpu: string
-    memory: string
-    disk: string
-  status:
-    state: string
-    temperature: string
-"""
+OUTPUT_SCHEMA = array_schema(NESTED_SCHEMA)
 
 log_text = """
 [2025-03-20 15:30:45] CPU: Intel Xeon E5-2670, Memory: 64GB DDR4, Status: Running, Disk: 512GB SSD, Temperature: 45°C
@@ -29,31 +23,26 @@ log_text = """
 # Tokenizer function
 def tokenize_text(text):
     """Tokenize the logs using Tiktoken."""
-    encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(text)
-    return tokens
-
+    return encode(text, MODEL_NAME)
 
-# Tokenize the logs
-log_tokens = tokenize_text(log_text)
-print("\n🔹 Log Tokens:", log_tokens)
-print("\n🔹 Log Tokens Count:", len(log_tokens))
 
+# Static part first and logs last, so repeated calls share a cacheable prefix
+PROMPT_HEADER = TOKENIZE_LOGS_PREFIX.compile() + "Logs:\n"
 
-prompt = f"""
-You are a log parsing AI.
-Your task is to extract attributes from tokenized logs according to the given schema.
+prompt = PROMPT_HEADER + log_text
 
-# Schema:
-{yaml_schema}
+token_accounting = TokenAccounting()
 
-# Tokenized Logs:
-{log_text}
 
-# Instructions:
-- Extract attributes and format them into JSON according to the schema.
-- Ensure valid JSON formatting without explanations.
-"""
+def estimate_tokens(prompt):
+    """(prompt, output) token estimates; the header is counted once, only the logs per call."""
+    if prompt.startswith(PROMPT_HEADER):
+        logs = prompt[len(PROMPT_HEADER):]
+        prompt_tokens = count_static(PROMPT_HEADER, MODEL_NAME) + count_tokens(logs, MODEL_NAME)
+    else:
+        logs = prompt
+        prompt_tokens = count_tokens(prompt, MODEL_NAME)
+    return prompt_tokens, OUTPUT_TOKENS_PER_LINE * sum(1 for line in logs.splitlines() if line.strip())
 
 
 def send_request(prompt):
@@ -62,76 +51,73 @@ def send_request(prompt):
         "model": MODEL_NAME,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.2,
-        "stream": False
+        "stream": False,
+        "keep_alive": KEEP_ALIVE,
+        # Constrain decoding to the schema so the output always parses
+        "format": OUTPUT_SCHEMA
     }
 
-    response = requests.post(OLLAMA_URL, json=payload)
+    options = {"temperature": payload["temperature"], "format": OUTPUT_SCHEMA}
+    key = cache_key(MODEL_NAME, prompt, options)
+    cached = get_cache().get(key)
+    if cached is not None:
+        return cached
+
+    response = get_client().chat(payload)
 
     if response.status_code != 200:
         print(f"❌ Error: {response.status_code}")
         print(response.text)
         return None
 
-    return response.json()
+    result = response.json()
+    token_accounting.record(*estimate_tokens(prompt), result)
+    get_cache().set(key, result)
+    return result
 
 
 def extract_json(raw_output):
-    """Extract valid JSON from the model's raw output and decode UTF-8 properly."""
+    """Parse the model's schema-constrained output and pretty-print it."""
     if not raw_output or "message" not in raw_output:
         return None
 
-    content = raw_output["message"]["content"]
-
-    content = content.replace('```json', '').replace('```', '').strip()
-
-    # Use looser regex matching for both raw and wrapped JSON
-    json_match = re.search(r'(\{.*?\}|\[.*?\])', content, re.DOTALL)
-
-    if json_match:
-        try:
-            # Double Unicode decoding process
-            clean_json = json_match.group(0)
-
-            # Step 1: Decode Unicode escape sequences
-            clean_json = clean_json.encode().decode('unicode_escape')
-
-            # Step 2: Decode it again as UTF-8 to handle double encoding
-            clean_json = clean_json.encode('latin1').decode('utf-8')
-
-            # Validate and parse the JSON
-            json_output = json.loads(clean_json)
-
-            # Pretty-print the final decoded JSON
-            return json.dumps(json_output, indent=4, ensure_ascii=False)
+    try:
+        json_output = json.loads(raw_output["message"]["content"])
+    except json.JSONDecodeError as e:
+        print(f"\n❌ JSON Decode Error: {e}")
+        return None
 
-        except json.JSONDecodeError as e:
-            print(f"\n❌ JSON Decode Error: {e}")
-            return None
+    return json.dumps(json_output, indent=4, ensure_ascii=False)
 
-    return None
 
+if __name__ == "__main__":
+    # Tokenize the logs
+    log_tokens = tokenize_text(log_text)
+    print("\n🔹 Log Tokens:", log_tokens)
+    print("\n🔹 Log Tokens Count:", len(log_tokens))
 
-# Main Execution
-start_time = time.time()
+    # Main Execution
+    start_time = time.time()
 
-print("\n⏱️ Sending request...")
-raw_output = send_request(prompt)
+    print("\n⏱️ Sending request...")
+    raw_output = send_request(prompt)
 
-if raw_output:
-    print("\n✅ Raw Output from Model:")
-    print(json.dumps(raw_output, indent=4))
+    if raw_output:
+        print("\n✅ Raw Output from Model:")
+        print(json.dumps(raw_output, indent=4))
 
-    parsed_output = extract_json(raw_output)
+        parsed_output = extract_json(raw_output)
 
-    if parsed_output:
-        print("\n✅ Extracted JSON Output:\n", parsed_output)
+        if parsed_output:
+            print("\n✅ Extracted JSON Output:\n", parsed_output)
+        else:
+            print("\n❌ Failed to extract JSON output.")
     else:
-        print("\n❌ Failed to extract JSON output.")
-else:
-    print("\n❌ No valid response received.")
+        print("\n❌ No valid response received.")
 
-end_time = time.time()
-print(f"\n⏱️ Response Time: {end_time - start_time:.2f} seconds")
+    end_time = time.time()
+    print(f"\n⏱️ Response Time: {end_time - start_time:.2f} seconds")
+    print(f"📡 Telemetry: {get_telemetry().summary()}")
 
 
 """
@@ -1,22 +1,14 @@
 import json
-import requests
-import tiktoken
 import time
+from log_schema import array_schema
+from ollama_client import get_client
+from prompts import NESTED_SCHEMA, TOKENIZE_SCHEMA_PREFIX
+from token_batcher import OUTPUT_TOKENS_PER_LINE
+from tokenizer import TokenAccounting, count_static, count_tokens
 
-MODEL_URL = "http://localhost:11434/v1/chat/completions"
 MODEL = "mistral"
 
-yaml_schema = """
-server:
-  timestamp: string
-  hardware:
-    cpu: string
-    memory: string
-    disk: string
-  status:
-    state: string
-    temperature: string
-"""
+OUTPUT_SCHEMA = array_schema(NESTED_SCHEMA)
 
 log_text = """
 [2025-03-20 15:30:45] CPU: Intel Xeon E5-2670, Memory: 64GB DDR4, Status: Running, Disk: 512GB SSD, Temperature: 45°C
@@ -24,51 +16,28 @@ log_text = """
 """
 
 
-def build_prompt_with_schema_and_logs(schema_tokens, log_tokens):
-    return (
-        "Extract attributes and their values from the following logs according to the provided schema.\n"
-        "Strictly output as a valid, compact JSON array with no explanation or extra formatting.\n"
-        "If the JSON cannot be constructed, return an empty JSON array []\n\n"
-        "# Schema Tokens:\n"
-        f"{schema_tokens}\n\n"
-        "# Logs:\n"
-        f"{log_tokens}\n\n"
-        "# Output format example:\n"
-        "[\n"
-        "  {\"timestamp\": \"2025-03-20 15:30:45\", \"cpu\": \"Intel Xeon E5-2670\", \"memory\": \"64GB DDR4\", "
-        "\"status\": \"Running\", \"disk\": \"512GB SSD\", \"temperature\": \"45°C\"},\n"
-        "  {\"timestamp\": \"2025-03-20 15:35:22\", \"cpu\": \"AMD EPYC 7742\", \"memory\": \"128GB DDR4\", "
-        "\"status\": \"Idle\", \"disk\": \"1TB NVMe\", \"temperature\": \"40°C\"}\n"
-        "]\n\n"
-        "# Important:\n"
-        "- Only return valid JSON. Do not describe or explain anything.\n"
-        "- No markdown, code blocks, or comments.\n"
-    )
-
-
-# Pre-tokenizes the schema using the LLM tokenizer.
-def pre_tokenize(schema):
-    tokenizer = tiktoken.get_encoding("cl100k_base")
-    tokens = tokenizer.encode(schema)
-    print("Schema Tokens :: ")
-    print(tokens)
-    return tokens
-
-
-pre_tokenized_schema = pre_tokenize(yaml_schema)
+# Compact schema text, not token IDs: models read text, and IDs rendered as digits cost more tokens
+PROMPT_HEADER = TOKENIZE_SCHEMA_PREFIX.compile() + "Logs:\n"
+
+
+def build_prompt_with_schema_and_logs(logs):
+    return PROMPT_HEADER + logs
+
+
+token_accounting = TokenAccounting()
+
+
+def estimate_tokens(logs):
+    """(prompt, output) token estimates; the prompt around the logs is counted once."""
+    lines = sum(1 for line in logs.splitlines() if line.strip())
+    return count_static(PROMPT_HEADER, MODEL) + count_tokens(logs, MODEL), OUTPUT_TOKENS_PER_LINE * lines
 
 
 def safe_json_parse(response):
     """
-    Safely extract and parses JSON from the LLM response.
-    Handle cases where the JSON is surrounded by extra text or in code blocks.
+    Parse the LLM response. Decoding is constrained to OUTPUT_SCHEMA,
+    so the output is plain JSON with no code fences or extra text.
     """
-    response = response.strip()
-
-    # Remove markdown code block symbols if present
-    if response.startswith("```json") and response.endswith("```"):
-        response = response[7:-3].strip()
-
     print("\n🔍 Raw Output from Model:\n", response)
 
     # Attempt to parse JSON
@@ -81,10 +50,10 @@ def safe_json_parse(response):
         return None
 
 
-def parse_logs_with_schema(logs, schema_tokens):
-    """Send logs with pre-tokenized schema for faster processing."""
+def parse_logs_with_schema(logs):
+    """Send logs after the compiled schema prompt."""
 
-    prompt = build_prompt_with_schema_and_logs(schema_tokens, logs)
+    prompt = build_prompt_with_schema_and_logs(logs)
 
     payload = {
         "model": MODEL,
@@ -93,17 +62,23 @@ def parse_logs_with_schema(logs, schema_tokens):
             {"role": "user", "content": prompt}
         ],
         "max_tokens": 1024,
-        "temperature": 0.2
+        "temperature": 0.2,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "server_logs", "schema": OUTPUT_SCHEMA}
+        }
     }
 
     start_time = time.time()
 
-    response = requests.post(MODEL_URL, json=payload)
+    response = get_client().chat_completions(payload)
 
     duration = time.time() - start_time
 
     if response.status_code == 200:
-        result = response.json()["choices"][0]["message"]["content"]
+        body = response.json()
+        token_accounting.record(*estimate_tokens(logs), body)
+        result = body["choices"][0]["message"]["content"]
         parsed_output = safe_json_parse(result)
         if parsed_output:
             print("\n✅ Parsed JSON Output:\n", json.dumps(parsed_output, indent=4))
@@ -116,7 +91,10 @@ def parse_logs_with_schema(logs, schema_tokens):
         print(f"❌ Failed with status {response.status_code}: {response.text}")
 
 
-parse_logs_with_schema(log_text, pre_tokenized_schema)
+if __name__ == "__main__":
+    print(f"📏 Prompt header: {count_static(PROMPT_HEADER, MODEL)} tokens")
+
+    parse_logs_with_schema(log_text)
 
 """
 Schema Tokens :: 
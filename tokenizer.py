@@ -0,0 +1,115 @@
+"""Shared tiktoken encoders: cached per model family, bulk counting, and prompt token accounting.
+
+Ollama's models use their own vocabularies, so every count here is an
+estimate; TokenAccounting compares it with what the server reports.
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+import tiktoken
+
+
+DEFAULT_ENCODING = "cl100k_base"
+MODEL_ENCODINGS = {
+    "mistral": "cl100k_base",
+    "phi": "cl100k_base",
+}
+NUM_THREADS = min(8, os.cpu_count() or 1)  # Threads for encode_ordinary_batch
+BULK_MIN = 64  # Below this many texts, a plain loop beats the thread pool
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name=DEFAULT_ENCODING):
+    return tiktoken.get_encoding(name)
+
+
+def encoding_for(model=None):
+    """Encoder for a model name such as "mistral" or "phi:latest"."""
+    family = model.split(":")[0] if model else None
+    return get_encoding(MODEL_ENCODINGS.get(family, DEFAULT_ENCODING))
+
+
+def encode(text, model=None):
+    return encoding_for(model).encode(text)
+
+
+@lru_cache(maxsize=256)
+def encode_static(text, model=None):
+    """Tokens of a static prompt part, encoded once per process."""
+    return tuple(encoding_for(model).encode_ordinary(text))
+
+
+def count_static(text, model=None):
+    return len(encode_static(text, model))
+
+
+def count_tokens(text, model=None):
+    """Token count of a piece of prompt text."""
+    return len(encoding_for(model).encode_ordinary(text))
+
+
+def count_tokens_batch(texts, model=None, num_threads=NUM_THREADS):
+    """Token counts of many texts, encoded across threads by tiktoken."""
+    encoding = encoding_for(model)
+    texts = list(texts)
+    if len(texts) < BULK_MIN:
+        return [len(encoding.encode_ordinary(text)) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=num_threads)]
+
+
+class PromptCounter:
+    """Token count of prompts built from fixed parts plus newline-joined log lines.
+
+    The fixed parts are counted once; each batch only encodes its lines.
+    """
+
+    def __init__(self, static_parts, model=None):
+        self.model = model
+        self.static_tokens = sum(count_static(part, model) for part in static_parts)
+
+    def count(self, lines):
+        # +1 per line for the newline joining it into the prompt
+        return self.static_tokens + sum(count_tokens_batch(lines, self.model)) + len(lines)
+
+
+class TokenAccounting:
+    """Per-call token estimates next to the server's prompt_eval_count and eval_count."""
+
+    def __init__(self):
+        self.calls = 0
+        self.estimated_prompt = 0
+        self.estimated_output = 0
+        self.server_prompt = 0
+        self.server_output = 0
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens, output_tokens, metadata):
+        """Record one call; metadata is Ollama's response body or LangChain response_metadata."""
+        metadata = metadata or {}
+        usage = metadata.get("usage") or {}
+        evaluated = metadata.get("prompt_eval_count", usage.get("prompt_tokens"))
+        generated = metadata.get("eval_count", usage.get("completion_tokens"))
+
+        print(f"📏 Tokens: prompt ~{prompt_tokens} (server {evaluated}), "
+              f"output ~{output_tokens} (server {generated})")
+
+        if evaluated is None or generated is None:
+            return
+        with self._lock:
+            self.calls += 1
+            self.estimated_prompt += prompt_tokens
+            self.estimated_output += output_tokens
+            self.server_prompt += evaluated
+            self.server_output += generated
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "estimated_prompt_tokens": self.estimated_prompt,
+                "server_prompt_tokens": self.server_prompt,
+                "estimated_output_tokens": self.estimated_output,
+                "server_output_tokens": self.server_output,
+            }